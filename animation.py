@@ -0,0 +1,91 @@
+# animation.py
+import pygame
+
+# Animation states the Animator moves between
+STATES = ('idle', 'run', 'jump', 'fall')
+
+class SpriteSheet:
+    def __init__(self, atlas, columns, rows, faces_right=True):
+        """ Split an atlas surface into a grid of equally sized frames, plus mirrored copies """
+        self.atlas = atlas
+        self.faces_right = faces_right
+        # Mirrored atlas, flipped once instead of flipping frames every draw. That happens the first
+        # time a mirrored frame is asked for rather than at load time, so it is not on the startup path.
+        self.mirrored_atlas = None
+
+        atlas_width, atlas_height = atlas.get_size()
+        self.frame_width = atlas_width // columns
+        self.frame_height = atlas_height // rows
+
+        # Frame rectangles, precomputed in reading order (left to right, top to bottom)
+        self.frame_rects = [pygame.Rect(column * self.frame_width, row * self.frame_height, self.frame_width, self.frame_height)
+                            for row in range(rows) for column in range(columns)]
+
+        # Subsurfaces share the atlas pixels, so each frame is a view drawn with one area blit
+        # and switching frames allocates nothing
+        self.frames = [atlas.subsurface(rect) for rect in self.frame_rects]
+        self.mirrored_frames = None # Made by mirror()
+
+    def mirror(self):
+        """ Flip the atlas and cut the mirrored frames from it """
+        self.mirrored_atlas = pygame.transform.flip(self.atlas, True, False)
+        atlas_width = self.atlas.get_width()
+        # Frame i of the mirrored atlas sits at the horizontally mirrored rect
+        self.mirrored_frames = [self.mirrored_atlas.subsurface(pygame.Rect(atlas_width - rect.right, rect.y, rect.width, rect.height))
+                                for rect in self.frame_rects]
+
+    def frame(self, index, facing_left):
+        """ Frame surface for the given index and direction """
+        if facing_left != self.faces_right:
+            return self.frames[index] # Facing the way it was drawn
+        if self.mirrored_frames is None:
+            self.mirror()
+        return self.mirrored_frames[index]
+
+
+class Animator:
+    def __init__(self, sheet, animations):
+        """ Pick frames from a SpriteSheet with a state machine driven by movement.
+
+        animations maps state name ('idle', 'run', 'jump', 'fall') to
+        (list of frame indices, simulation steps per frame).
+        """
+        self.sheet = sheet
+        self.animations = animations
+        self.state = 'idle'
+        self.facing_left = False
+        self.frame_position = 0 # Position in the current animation's frame list
+        self.ticks = 0 # Steps spent on the current frame
+
+    def next_state(self, change_x, change_y, on_ground):
+        """ Animation state for the given velocity and ground contact """
+        if on_ground:
+            return 'run' if change_x != 0 else 'idle'
+        return 'jump' if change_y < 0 else 'fall'
+
+    def update(self, change_x, change_y, on_ground):
+        """ Advance one simulation step and return the frame to show """
+        if change_x < 0:
+            self.facing_left = True
+        elif change_x > 0:
+            self.facing_left = False
+
+        state = self.next_state(change_x, change_y, on_ground)
+        frames, steps_per_frame = self.animations[state]
+        if state != self.state:
+            # Restart the new animation from its first frame
+            self.state = state
+            self.frame_position = 0
+            self.ticks = 0
+        else:
+            self.ticks += 1
+            if self.ticks >= steps_per_frame:
+                self.ticks = 0
+                self.frame_position = (self.frame_position + 1) % len(frames)
+
+        return self.current_frame()
+
+    def current_frame(self):
+        """ Frame for the current state, position and direction """
+        frames, _ = self.animations[self.state]
+        return self.sheet.frame(frames[self.frame_position], self.facing_left)
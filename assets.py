@@ -0,0 +1,326 @@
+# assets.py
+import os
+import mmap
+import struct
+import hashlib
+from collections import OrderedDict
+import pygame
+import settings # Import settings module
+
+# Pixel layout of the raw buffers stored in the cache
+CACHE_PIXEL_FORMAT = 'RGBA'
+
+# Each cache file is a small header (width, height) followed by the raw pixels
+CACHE_HEADER = struct.Struct('<II')
+
+# Source file hashes, keyed by (path, mtime, size) so unchanged files are not re-read
+_hash_memo = {}
+
+
+def file_hash(path):
+    """ Return a content hash for the file at path """
+    try:
+        stat = os.stat(path)
+        memo_key = (path, stat.st_mtime_ns, stat.st_size)
+        digest = _hash_memo.get(memo_key)
+        if digest is None:
+            with open(path, 'rb') as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+            _hash_memo[memo_key] = digest
+        return digest
+    except OSError as e:
+        # Report missing/unreadable files the same way pygame.image.load reports bad images
+        raise pygame.error(f"Cannot read image '{path}': {e}")
+
+
+def file_stamp(path):
+    """ (mtime, size) of a file, or None if it does not exist """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def cache_path(path, size):
+    """ Path of the cached raw buffer for an image at a given size (None = its natural size) """
+    size_key = 'native' if size is None else f"{size[0]}x{size[1]}"
+    name = f"{file_hash(path)}_{size_key}_{CACHE_PIXEL_FORMAT}.raw"
+    return os.path.join(settings.ASSET_CACHE_DIR, name)
+
+
+def decode_image(path, size=None):
+    """ Decode an image file and scale it to size (if given), without converting it for the display """
+    try:
+        img = pygame.image.load(path)
+    except OSError as e:
+        # pygame raises FileNotFoundError for a missing file; callers only expect pygame.error
+        raise pygame.error(f"Cannot read image '{path}': {e}")
+    if size is not None and img.get_size() != tuple(size):
+        img = pygame.transform.scale(img, size)
+    return img
+
+
+def load_image(path, size=None, alpha=True):
+    """ Load an image scaled to size (if given) and converted for the display (with alpha unless alpha is False), using the on-disk cache """
+    img = load_unconverted(path, size)
+    return img.convert_alpha() if alpha else img.convert()
+
+
+def load_unconverted(path, size=None):
+    """ Load an image scaled to size (if given) but not yet converted for the display.
+
+    Safe to call from worker threads: PNG decoding and scaling release the GIL,
+    while convert_alpha() must happen on the main thread.
+    """
+    if not settings.ASSET_CACHE_ENABLED:
+        return decode_image(path, size)
+
+    raw_path = cache_path(path, size)
+    img = load_raw(raw_path)
+    if img is not None:
+        try:
+            os.utime(raw_path) # The modification time records the last use, for prune_cache()
+        except OSError:
+            pass
+        return img
+
+    # Cache miss: decode and resample once, then store the result for next time
+    img = decode_image(path, size)
+    store_raw(raw_path, img)
+    return img
+
+
+def load_raw(raw_path):
+    """ Memory-map a cached raw buffer and wrap it in a surface, or return None if unavailable """
+    try:
+        with open(raw_path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError): # ValueError: empty file cannot be mapped
+        return None
+
+    size = None
+    if len(mapped) >= CACHE_HEADER.size:
+        width, height = CACHE_HEADER.unpack_from(mapped)
+        if len(mapped) == CACHE_HEADER.size + width * height * len(CACHE_PIXEL_FORMAT):
+            size = (width, height)
+    if size is None:
+        mapped.close()
+        return None # Truncated or corrupt file, rebuild it
+
+    # The surface shares the mapped pixels (no copy); the mapping is released with the surface,
+    # normally right after convert_alpha() has copied the pixels into display format
+    return pygame.image.frombuffer(memoryview(mapped)[CACHE_HEADER.size:], size, CACHE_PIXEL_FORMAT)
+
+
+def store_raw(raw_path, img):
+    """ Write an image's pixels to the cache as a raw buffer """
+    try:
+        os.makedirs(settings.ASSET_CACHE_DIR, exist_ok=True)
+        temp_path = raw_path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(CACHE_HEADER.pack(*img.get_size()))
+            f.write(pygame.image.tobytes(img, CACHE_PIXEL_FORMAT))
+        os.replace(temp_path, raw_path) # Atomic, so a partial write is never picked up
+    except OSError as e:
+        print(f"Warning: could not write asset cache file {raw_path}: {e}")
+
+
+def prune_cache(max_bytes=None):
+    """ Delete the least recently used cache files until the cache is within max_bytes.
+
+    Every render scale and every edit of a source image adds files, so without this the
+    cache only grows. Returns the number of files removed.
+    """
+    max_bytes = settings.ASSET_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    try:
+        names = os.listdir(settings.ASSET_CACHE_DIR)
+    except OSError:
+        return 0 # No cache yet
+
+    files = []
+    total = 0
+    for name in names:
+        path = os.path.join(settings.ASSET_CACHE_DIR, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        files.append((stat.st_mtime_ns, stat.st_size, path))
+        total += stat.st_size
+
+    removed = 0
+    for _, size, path in sorted(files): # Least recently used first
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+
+class PoolEntry:
+    def __init__(self, surface, stamp):
+        """ One pooled surface and the number of users holding it """
+        self.surface = surface
+        self.stamp = stamp # Source file stamp when loaded, to notice the file changing
+        self.refs = 0
+        self.nbytes = surface.get_pitch() * surface.get_height()
+
+
+class SurfacePool:
+    def __init__(self, budget=None):
+        """ Shared, reference-counted display-format images, deduplicated by (path, size, alpha).
+
+        Every acquire() must be paired with a release(). Images nobody holds stay resident for quick
+        reuse, least recently used first out, while the pool holds more than budget bytes.
+        Use from the main thread only.
+        """
+        self.budget = settings.SURFACE_POOL_BUDGET if budget is None else budget
+        self.entries = OrderedDict() # Key -> PoolEntry, least recently used first
+        self.keys = {} # Surface -> its key, for release()
+        self.pending = {} # Key -> on_loaded callbacks waiting for the same background load
+        self.resident_bytes = 0 # Pixel bytes of every pooled surface, held or not
+        self.loads = 0 # Images loaded (or submitted for loading) because they were not resident
+
+    def make_key(self, path, size, alpha):
+        """ Dictionary key identifying one loaded variant of an image """
+        return (path, None if size is None else tuple(size), alpha)
+
+    def lookup(self, key):
+        """ Return the resident entry for key, dropping it if its file changed since it was loaded """
+        entry = self.entries.get(key)
+        if entry is not None and entry.stamp != file_stamp(key[0]):
+            self.drop(key) # Holders keep their copy; the next acquire loads the new file
+            entry = None
+        return entry
+
+    def insert(self, key, surface):
+        """ Make a freshly loaded surface resident under key """
+        entry = PoolEntry(surface, file_stamp(key[0]))
+        self.entries[key] = entry
+        self.keys[surface] = key
+        self.resident_bytes += entry.nbytes
+        return entry
+
+    def drop(self, key):
+        """ Forget an entry (its surface is freed once nothing else references it) """
+        entry = self.entries.pop(key)
+        del self.keys[entry.surface]
+        self.resident_bytes -= entry.nbytes
+
+    def hold(self, key, entry, count=1):
+        """ Add count references to an entry and mark it most recently used """
+        entry.refs += count
+        self.entries.move_to_end(key)
+        return entry.surface
+
+    def acquire(self, path, size=None, alpha=True):
+        """ Return the image at path scaled to size (None = natural size), loading it if not resident.
+
+        Raises pygame.error like load_image() if it cannot be loaded.
+        """
+        key = self.make_key(path, size, alpha)
+        entry = self.lookup(key)
+        if entry is None:
+            self.loads += 1
+            entry = self.insert(key, load_image(path, size, alpha))
+        surface = self.hold(key, entry)
+        self.trim()
+        return surface
+
+    def acquire_derived(self, source, variant, build):
+        """ Return build(source) for a pooled surface source, shared by everyone asking for the same variant.
+
+        The entry is keyed by source's key plus variant (which must describe everything build
+        depends on), so it is counted against the budget, dropped when the source file changes,
+        and released with release() like any other. An unpooled source is simply built from.
+        """
+        source_key = self.keys.get(source)
+        if source_key is None:
+            return build(source)
+        key = source_key + (variant,)
+        entry = self.lookup(key)
+        if entry is None:
+            entry = self.insert(key, build(source))
+        surface = self.hold(key, entry)
+        self.trim()
+        return surface
+
+    def acquire_async(self, loader, path, size, on_loaded, alpha=True):
+        """ Like acquire(), but loads on an AssetLoader; on_loaded(surface or None) runs on the main thread.
+
+        A resident image is handed over immediately, and requests for an image already
+        loading share that one load.
+        """
+        key = self.make_key(path, size, alpha)
+        entry = self.lookup(key)
+        if entry is not None:
+            on_loaded(self.hold(key, entry))
+            return
+
+        waiting = self.pending.get(key)
+        if waiting is not None:
+            waiting.append(on_loaded)
+            return
+        self.pending[key] = [on_loaded]
+        self.loads += 1
+        loader.submit(path, size, lambda img, key=key: self.finish_load(key, img), alpha)
+
+    def finish_load(self, key, img):
+        """ Loader callback: make the image resident and hand it to everyone waiting for it """
+        waiting = self.pending.pop(key)
+        if img is not None:
+            entry = self.lookup(key)
+            if entry is None:
+                entry = self.insert(key, img)
+            # else a synchronous acquire() loaded it meanwhile: share that one and let img go
+            img = self.hold(key, entry, len(waiting))
+        for on_loaded in waiting:
+            on_loaded(img)
+        self.trim()
+
+    def release(self, surface):
+        """ Give back a surface from acquire(); it stays resident until evicted """
+        key = self.keys.get(surface)
+        if key is None:
+            return # Not pooled, or dropped because its file changed
+        entry = self.entries[key]
+        entry.refs -= 1
+        if entry.refs <= 0:
+            entry.refs = 0
+            self.entries.move_to_end(key) # Most recently used of the unreferenced entries
+            self.trim()
+
+    def trim(self):
+        """ Evict unreferenced entries, least recently used first, until within the budget """
+        if self.resident_bytes <= self.budget:
+            return
+        for key in [key for key, entry in self.entries.items() if entry.refs == 0]:
+            self.drop(key)
+            if self.resident_bytes <= self.budget:
+                break
+
+    def clear(self):
+        """ Evict every unreferenced entry """
+        for key in [key for key, entry in self.entries.items() if entry.refs == 0]:
+            self.drop(key)
+
+    def stats(self):
+        """ Entry counts and byte totals, for debugging memory use """
+        held = [entry for entry in self.entries.values() if entry.refs > 0]
+        return {
+            'entries': len(self.entries),
+            'held': len(held),
+            'resident_bytes': self.resident_bytes,
+            'held_bytes': sum(entry.nbytes for entry in held),
+            'budget': self.budget,
+            'loads': self.loads,
+        }
+
+
+# The pool shared by everything in the process
+shared_pool = SurfacePool()
@@ -1,146 +1,292 @@
 # background.py
 import pygame
 import settings
-import os
-import math
+import assets
+import layers # Import layer manifest module
+import render # Import render list module
 
 class BackgroundManager:
-    def __init__(self):
-        """ Initialize Background Manager """
+    def __init__(self, loader=None, render_scale=1.0, manifest_path=None, pool=None):
+        """ Initialize Background Manager, loading layers in the background if an AssetLoader is given.
+
+        render_scale sizes the layers for a framebuffer that is that fraction of the logical
+        SCREEN_WIDTH x SCREEN_HEIGHT (1.0 = full resolution). The layers and their layout come
+        from the layer manifest (see layers.py). Layer images are shared through an
+        assets.SurfacePool (the process-wide one by default), so managers showing the same
+        layers hold one copy of each; call close() to give them back.
+        """
+        # Layout is defined in logical screen pixels; layers are loaded and drawn at this scale of it
+        self.render_scale = render_scale
+        self.manifest_path = manifest_path or settings.LAYER_MANIFEST_PATH
+        self.pool = pool or assets.shared_pool
+
+        # Render plan: each layer's size, position and scroll speed, resolved once from the manifest
+        self.plan = []
+        self.plan_generation = 0 # Incremented per plan, so images loading for an older one are dropped
+
+        # Layer images held from the pool, as loaded (before wrapping)
+        self.source_images = []
+        self.strips = [] # Pre-tiled strips held from the pool (None for layers drawn from the image)
+
         # List to store (image_surface, y_position) tuples for drawing
-        # Y position is calculated based on which layer is the ground or example offsets
+        # Repeating layers are stored as pre-tiled strips (see make_strip)
         self.positioned_layers = []
-        self.load_layers() # Automatically load layers on initialization
+        self.tile_widths = [] # Width of one repeat of each layer's strip
+
+        # Pre-composited background cache (see build_cache)
+        # The leading layers that never scroll do not move relative to each other, so they
+        # are flattened once into a single opaque surface that is blitted with one call per frame.
+        self.static_layer_count = 0 # Number of leading layers baked into the cache
+        self.frozen_layers = 0 # Leading layers baked into the cache even though they scroll (lower quality)
+        self.ground_fill_enabled = True # Bake the below-ground fill into the layer strips
+        self.use_cache = settings.BACKGROUND_CACHE_ENABLED
+        self.cached_composite = None
+        self.cache_size = None # Size the cache was built for, used to detect screen size changes
+        self.revision = 0 # Incremented whenever the layers (and so the drawn background) change
+
+        # Automatically load layers on initialization
+        if loader is not None:
+            self.load_layers_async(loader)
+        else:
+            self.load_layers()
 
     def load_layers(self):
-        """ Load, scale, and calculate position for background layers """
-        self.positioned_layers = [] # Clear previous layers
-
-        # Iterate through background layer paths defined in settings
-        for i, layer_path in enumerate(settings.BACKGROUND_LAYER_PATHS):
-            layer_img = None # Initialize image variable
-            y_pos = 0 # Default Y position
-
-            try:
-                # Load image
-                img = pygame.image.load(layer_path)
-                # Convert with alpha for transparency
-                img = img.convert_alpha()
-
-                # --- Scale based on layer index ---
-                # Layers 3 and 4 are scaled differently for tiling
-                if i in [3, 4]: # Layer 3 (Trees) and Layer 4 (Foreground)
-                     img = pygame.transform.scale(img, (settings.TILED_LAYER_SCALED_WIDTH, settings.TILED_LAYER_SCALED_HEIGHT))
-                else: # Other layers (0, 1, 2) - Scale to fill/exceed screen width/height
-                     img = pygame.transform.scale(img, (settings.BACKGROUND_SCALED_WIDTH, settings.BACKGROUND_SCALED_HEIGHT))
-
-                layer_img = img # Assign scaled image
-
-            except pygame.error as e:
-                print(f"Error loading or scaling background layer {layer_path}: {e}")
-                # Append None so indices are consistent even if a layer fails to load
-                self.positioned_layers.append((None, y_pos)) # Append None image with default Y
-                continue # Skip positioning calculation if loading failed
-
-            # --- Calculate Y position for drawing based on layer index and settings ---
-            # Using example Ys and aligning the main ground layer (Layer 3)
-            if i == 0: # Layer 0 (Sky)
-                y_pos = settings.BG_Y # Which is 0
-            elif i == 1: # Layer 1 (Far Mountains)
-                y_pos = settings.FAR_MOUNTAIN_Y # Example Y
-            elif i == 2: # Layer 2 (Closer Mountains)
-                y_pos = settings.MOUNTAINS_Y # Example Y
-            elif i == 3: # Layer 3 (Middle Trees - User identified as ground)
-                # Calculate Y so its ground line (offset from its top) aligns with VISIBLE_GROUND_Y
-                # Use the scaled height of this specific layer (TILED_LAYER_SCALED_HEIGHT)
-                y_pos = settings.VISIBLE_GROUND_Y - settings.MIDDLE_TREES_GROUND_Y_OFFSET_SCALED
-            elif i == 4: # Layer 4 (Foreground)
-                # Position this layer visually below the main ground layer (Layer 3)
-                # Use its specific example Y constant
-                y_pos = settings.FOREGROUND_Y
-
-
-            # Append the loaded image and its calculated Y position
-            self.positioned_layers.append((layer_img, y_pos))
-
-
-    def draw(self, surface):
-        """ Draw background layers onto the given surface """
-        if self.positioned_layers: # Check if any layers were loaded
-            # Draw layers in the correct visual order (from furthest to nearest)
-            # Indices: 0=bg, 1=far-mtn, 2=mtn, 3=trees (tiled), 4=foreground (tiled)
-
-            # Draw layers 0, 1, 2 (scaled to 1020x600)
-            for i in range(3): # Layers 0, 1, 2
-                 if len(self.positioned_layers) > i and self.positioned_layers[i][0] is not None:
-                      layer_img, y_pos = self.positioned_layers[i]
-                      surface.blit(layer_img, (0, y_pos))
-
-            # Draw Layer 3 (Middle Trees - Tiled Horizontally)
-            if len(self.positioned_layers) > 3 and self.positioned_layers[3][0] is not None:
-                 trees_img, y_pos = self.positioned_layers[3]
-                 # Calculate how many times to tile horizontally
-                 tile_width = trees_img.get_width() # Should be TILED_LAYER_SCALED_WIDTH (272)
-                 num_tiles = math.ceil(settings.SCREEN_WIDTH / tile_width) # Ensure it covers screen width
-
-                 # Tile horizontally at the calculated Y position
-                 for j in range(num_tiles):
-                      surface.blit(trees_img, (j * tile_width, y_pos))
-
-                 # --- Optional: Tile Layer 3 vertically below the ground line ---
-                 # This is an interpretation of "纵向 复制延伸" below the main ground level.
-                 # If you only want a single horizontal strip, comment out this block.
-                 try:
-                     # Get the portion of the image *below* the ground line
-                     # This portion starts at settings.MIDDLE_TREES_GROUND_Y_OFFSET_SCALED pixels from the top of the (272x600) image
-                     # Its height is the total scaled height minus the offset to the ground line
-                     # Ensure offset is not larger than height
-                     if settings.MIDDLE_TREES_GROUND_Y_OFFSET_SCALED < trees_img.get_height():
-                          height_below_ground_line = trees_img.get_height() - settings.MIDDLE_TREES_GROUND_Y_OFFSET_SCALED # 600 - 570 = 30 (example)
-                     else:
-                          height_below_ground_line = 0 # No portion below if offset is invalid or at/above height
-
-                     if height_below_ground_line > 0:
-                         # Define the rectangular area of the image below the ground line
-                         portion_rect = (0, settings.MIDDLE_TREES_GROUND_Y_OFFSET_SCALED, tile_width, height_below_ground_line)
-                         portion_below_ground = trees_img.subsurface(portion_rect)
-
-                         vertical_tile_height = portion_below_ground.get_height()
-                         # Start vertical tiling from the VISIBLE_GROUND_Y line downwards
-                         start_y_for_vertical_tile = settings.VISIBLE_GROUND_Y
-
-                         if vertical_tile_height > 0: # Avoid division by zero
-                              # Calculate how many times to tile vertically down to SCREEN_HEIGHT
-                              remaining_screen_height_below_ground = settings.SCREEN_HEIGHT - start_y_for_vertical_tile
-                              if remaining_screen_height_below_ground > 0:
-                                   # Add a buffer just in case
-                                   num_vertical_tiles = math.ceil(remaining_screen_height_below_ground / vertical_tile_height)
-
-                                   for k in range(num_vertical_tiles):
-                                        # Tile horizontally for each vertical position
-                                        current_vertical_y = start_y_for_vertical_tile + k * vertical_tile_height
-
-                                        # Only draw if the tile is at least partially on screen
-                                        # Check if the top of the tile is above the screen bottom
-                                        if current_vertical_y < settings.SCREEN_HEIGHT:
-                                            # Check if the bottom of the tile is below the screen top (0) - shouldn't happen if start_y is > 0
-                                            if current_vertical_y + vertical_tile_height > 0:
-                                                 for j in range(num_tiles): # Tile horizontally
-                                                      surface.blit(portion_below_ground, (j * tile_width, current_vertical_y))
-
-                 except pygame.error as e:
-                      print(f"Error creating or tiling vertical portion of Layer 3: {e}")
-                 except Exception as e:
-                      print(f"An unexpected error occurred during Layer 3 vertical tiling: {e}")
-
-
-            # Draw Layer 4 (Foreground) - Tiled Horizontally
-            if len(self.positioned_layers) > 4 and self.positioned_layers[4][0] is not None:
-                 foreground_img, y_pos = self.positioned_layers[4]
-                 # Calculate how many times to tile horizontally
-                 tile_width = foreground_img.get_width() # Should be TILED_LAYER_SCALED_WIDTH (272)
-                 num_tiles = math.ceil(settings.SCREEN_WIDTH / tile_width) # Ensure it covers screen width
-
-                 # Tile horizontally at the calculated Y position (settings.FOREGROUND_Y)
-                 for j in range(num_tiles):
-                      surface.blit(foreground_img, (j * tile_width, y_pos))
+        """ Read the layer manifest, then load and scale every layer """
+        self.use_plan(self.read_plan())
+
+    def load_layers_async(self, loader):
+        """ Read the layer manifest and queue the layers on an AssetLoader; each one is drawn as soon as it arrives """
+        self.use_plan(self.read_plan(), loader=loader)
+
+    def read_plan(self, strict=False):
+        """ Read the layer manifest and resolve its layout for this render scale.
+
+        Falls back to the default layout if the manifest cannot be read, or raises with strict.
+        """
+        specs = layers.read_manifest(self.manifest_path) if strict else layers.load_manifest(self.manifest_path)
+        return layers.build_render_plan(specs, self.render_scale)
+
+    def reload(self, loader=None):
+        """ Re-read the manifest; only images that are new, resized or changed on disk are loaded again.
+
+        If the manifest cannot be read (e.g. a half-finished edit), the current layers are kept.
+        Returns the number of images (re)loaded.
+        """
+        try:
+            plan = self.read_plan(strict=True)
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not reload layer manifest {self.manifest_path}: {e}. Keeping the current layers.")
+            return 0
+        loads = self.pool.loads
+        self.use_plan(plan, loader) # Unchanged images are still resident in the pool
+        return self.pool.loads - loads
+
+    def layer_paths(self):
+        """ Image paths of the current layers """
+        return [layer.path for layer in self.plan]
+
+    def use_plan(self, plan, loader=None):
+        """ Switch to a render plan and acquire its images from the pool """
+        previous_images = [img for img in self.source_images + self.strips if img is not None]
+
+        self.plan = plan
+        self.plan_generation += 1
+        self.source_images = [None] * len(plan)
+        self.strips = [None] * len(plan)
+        self.tile_widths = [None] * len(plan)
+        self.positioned_layers = [(None, layer.y) for layer in plan]
+
+        self.update_static_layers()
+
+        for i, layer in enumerate(plan):
+            if loader is not None:
+                # Bind i and the generation now so each callback updates its own layer of this plan
+                self.pool.acquire_async(loader, layer.path, layer.size,
+                                        lambda img, i=i, generation=self.plan_generation: self.set_loaded_layer(generation, i, img))
+            else:
+                try:
+                    # Load, scale and convert with alpha for transparency (served from the pool or asset cache when possible)
+                    img = self.pool.acquire(layer.path, layer.size)
+                except pygame.error as e:
+                    print(f"Error loading or scaling background layer {layer.path}: {e}")
+                    continue # Leave the None placeholder so indices stay consistent
+                self.set_layer(i, img)
+
+        # Released only now, so images the new plan still uses are never evicted in between
+        for img in previous_images:
+            self.pool.release(img)
+
+    def update_static_layers(self):
+        """ Work out how many leading layers the static cache holds, and invalidate it """
+        # Leading layers that do not scroll can be baked into the static cache
+        static_layer_count = 0
+        while static_layer_count < len(self.plan) and self.plan[static_layer_count].scroll == 0:
+            static_layer_count += 1
+        # Frozen layers are baked in too; they stop scrolling but cost nothing per frame
+        self.static_layer_count = max(static_layer_count, min(self.frozen_layers, len(self.plan)))
+
+        # Layers changed, so any existing composite is stale
+        self.invalidate_cache()
+
+    def set_frozen_layers(self, count):
+        """ Bake the first count layers into the static cache, scrolling or not (0 = only the static ones) """
+        if count != self.frozen_layers:
+            self.frozen_layers = count
+            self.update_static_layers()
+
+    def set_ground_fill(self, enabled):
+        """ Turn the below-ground fill on or off, rebuilding the strips that have one """
+        if enabled == self.ground_fill_enabled:
+            return
+        self.ground_fill_enabled = enabled
+        for i, (layer, img) in enumerate(zip(self.plan, self.source_images)):
+            if img is not None and layer.fill_offset is not None:
+                self.set_layer(i, img)
+
+    def set_render_scale(self, render_scale, loader=None):
+        """ Reload the layers sized for a framebuffer at a different render scale """
+        if render_scale != self.render_scale:
+            self.render_scale = render_scale
+            self.use_plan(self.read_plan(), loader)
+
+    def set_loaded_layer(self, generation, i, img):
+        """ Asset loader callback: install img unless the plan was replaced while it loaded """
+        if generation == self.plan_generation:
+            self.set_layer(i, img)
+        elif img is not None:
+            self.pool.release(img) # Nobody will use it, but it stays resident for a while
+
+    def close(self):
+        """ Give the layer images and strips back to the pool """
+        self.use_plan([])
+
+    def scaled(self, value):
+        """ Convert a logical screen distance to framebuffer pixels """
+        return round(value * self.render_scale)
+
+    def set_layer(self, i, img):
+        """ Install the loaded, scaled image for layer i (None if it failed to load) """
+        if img is None:
+            return # Keep the placeholder; the layer is simply not drawn
+        layer = self.plan[i]
+        self.source_images[i] = img
+
+        # Pre-tile repeating layers narrower than the screen once, so drawing them is a single area
+        # blit at any scroll offset. Wider layers are drawn from the image (two slices at most), and
+        # so are layers that never scroll, which only ever show their first screen width.
+        # A ground fill has to be baked in either way.
+        previous_strip = self.strips[i]
+        self.strips[i] = None
+        if layer.repeat:
+            self.tile_widths[i] = img.get_width()
+            fill = self.strip_fill(img, layer)
+            screen_width = self.scaled(settings.SCREEN_WIDTH)
+            if fill is not None or (layer.scroll != 0 and img.get_width() < screen_width):
+                # Pooled under a key derived from the image's, so managers showing the same
+                # layer share one strip and it counts against the pool budget
+                variant = ('strip', screen_width, layer.y, layer.fill_offset, tuple(layer.fill_rows)) if fill is not None \
+                    else ('strip', screen_width)
+                img = self.pool.acquire_derived(img, variant, lambda tile: self.make_strip(tile, layer))
+                self.strips[i] = img
+        if previous_strip is not None:
+            self.pool.release(previous_strip) # After acquiring, so a strip that is still wanted is not evicted
+        self.positioned_layers[i] = (img, layer.y)
+
+        # Layers changed, so any existing composite is stale
+        self.invalidate_cache()
+
+    def make_strip(self, tile, layer):
+        """ Repeat a tile across the screen width plus one tile of slack, with the layer's ground fill baked in """
+        tile_width, tile_height = tile.get_size()
+        # With a whole tile of slack, the screen-wide window at any offset within the first tile is inside
+        # the strip. A tile at least as wide as the screen is only given its fill.
+        width = tile_width
+        if tile_width < self.scaled(settings.SCREEN_WIDTH):
+            width = self.scaled(settings.SCREEN_WIDTH) + tile_width
+
+        # The part below the ground line is repeated in rows down to the bottom of the screen,
+        # so the strip grows to cover the last row
+        fill = self.strip_fill(tile, layer)
+        height = tile_height
+        if fill is not None:
+            height = max(height, layer.fill_rows[-1] + fill.get_height() - layer.y)
+
+        strip = pygame.Surface((width, height), pygame.SRCALPHA).convert_alpha()
+        for x in range(0, width, tile_width):
+            strip.blit(tile, (x, 0))
+            if fill is not None:
+                for row_y in layer.fill_rows:
+                    strip.blit(fill, (x, row_y - layer.y))
+        return strip
+
+    def strip_fill(self, tile, layer):
+        """ The part of the tile repeated below the ground line, or None if the layer has no ground fill """
+        if layer.fill_offset is None or not layer.fill_rows or not self.ground_fill_enabled:
+            return None
+        return tile.subsurface((0, layer.fill_offset, tile.get_width(), tile.get_height() - layer.fill_offset))
+
+    def invalidate_cache(self):
+        """ Drop the pre-composited background so it is rebuilt on the next draw """
+        self.cached_composite = None
+        self.cache_size = None
+        self.revision += 1 # Lets other renderers know the background changed
+
+    def build_cache(self, size, camera_x=0):
+        """ Flatten the static layers into one opaque surface of the given size.
+
+        Frozen layers (which would scroll) are baked at camera_x, so they stop where they are.
+        """
+        # Opaque surface in the display format: blitting it needs no per-pixel alpha blending
+        composite = pygame.Surface(size).convert()
+        composite.fill(settings.BLACK) # Same clear colour the main loop uses
+        commands = render.RenderList()
+        self.queue_layers(commands, camera_x, 0, self.static_layer_count, size[0])
+        commands.submit(composite)
+
+        self.cached_composite = composite
+        self.cache_size = size
+
+    def queue(self, render_list, size, camera_x=0):
+        """ Push the blits that draw the background on a target of the given size onto render_list """
+        first_layer = 0
+        if self.use_cache and self.static_layer_count > 0:
+            # (Re)build the composite if it is missing or the screen size changed
+            if self.cached_composite is None or self.cache_size != size:
+                self.build_cache(size, camera_x)
+
+            render_list.push(self.cached_composite, (0, 0), None, render.Z_BACKGROUND) # Single opaque full-screen blit
+            first_layer = self.static_layer_count # Only the scrolling layers are left to draw
+
+        self.queue_layers(render_list, camera_x, first_layer, len(self.positioned_layers), size[0])
+
+    def queue_layers(self, render_list, camera_x, first_layer, end_layer, target_width):
+        """ Push the blits for background layers [first_layer, end_layer), scrolled by camera_x """
+        # Draw layers in the correct visual order (from furthest to nearest)
+        for i in range(first_layer, end_layer):
+            layer_img, y_pos = self.positioned_layers[i]
+            if layer_img is None:
+                continue
+            layer = self.plan[i]
+            z = render.Z_BACKGROUND + i
+
+            # Each layer scrolls at its own fraction of the camera speed
+            offset_x = camera_x * layer.scroll
+            if not layer.repeat:
+                render_list.push(layer_img, (-int(offset_x), y_pos), None, z) # Drawn once, scrolls out of view
+                continue
+            self.queue_wrapped(render_list, layer_img, self.tile_widths[i], offset_x, y_pos, target_width, z)
+
+    def queue_wrapped(self, render_list, strip, tile_width, offset_x, y, target_width, z):
+        """ Push a horizontally repeating strip scrolled by offset_x as source-rect slices """
+        strip_width = strip.get_width()
+        strip_height = strip.get_height()
+
+        # Start inside the first tile at the wrapped offset. A strip from make_strip is a tile wider
+        # than the screen, so this is one slice; a wider target (e.g. a resized window) takes more.
+        src_x = int(offset_x) % tile_width
+        dest_x = 0
+        while dest_x < target_width:
+            slice_width = min(strip_width - src_x, target_width - dest_x)
+            render_list.push(strip, (dest_x, y), (src_x, 0, slice_width, strip_height), z)
+            dest_x += slice_width
+            src_x = (src_x + slice_width) % tile_width
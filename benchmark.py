@@ -0,0 +1,143 @@
+# benchmark.py
+# Headless benchmark: runs the game for a fixed number of frames with scripted input,
+# no window and no frame cap, and reports update/draw/present timings separately.
+#
+# Usage:
+#   python benchmark.py                  # 3000 frames, simulate + draw
+#   python benchmark.py --frames 10000 --sim-only
+#   python benchmark.py --json           # machine-readable output for CI
+#   python benchmark.py --backend texture # draw with SDL textures (see texture_renderer.py)
+import os
+import time
+import json
+import argparse
+
+# Must be set before pygame creates a display
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+import settings # Import settings module
+import game # Import game module
+import inputs # Import input module
+import texture_renderer # Import texture rendering backend module
+
+# Scripted input: (frame within the loop, action), queued like keyboard input (also used by farm.py)
+# Walks right with a few jumps, then back left, and repeats every SCRIPT_LENGTH frames.
+SCRIPT = [
+    (0, inputs.GO_RIGHT),
+    (40, inputs.JUMP),
+    (120, inputs.JUMP),
+    (200, inputs.RELEASE_RIGHT),
+    (220, inputs.GO_LEFT),
+    (300, inputs.JUMP),
+    (420, inputs.RELEASE_LEFT),
+]
+SCRIPT_LENGTH = 480
+
+
+def run(frames, sim_only=False, num_entities=0, backend='surface'):
+    """ Run the game for the given number of frames and return timing results """
+    pygame.display.init()
+    textures = None
+    if backend == 'texture':
+        pygame.display.set_mode((1, 1), pygame.HIDDEN)
+        textures = texture_renderer.TextureRenderer("benchmark")
+        screen = textures # Game.draw() draws onto it like a surface
+    else:
+        screen = pygame.display.set_mode((settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT))
+    game_state = game.Game()
+    player = game_state.player
+    if num_entities:
+        game_state.entities.spawn_random(num_entities, player.rect.centerx)
+
+    # Script lookup by frame within the loop
+    actions = dict(SCRIPT)
+
+    update_time = 0.0
+    draw_time = 0.0
+    present_time = 0.0
+    blits = 0 # Commands submitted from the render list
+
+    start = time.perf_counter()
+    for frame in range(frames):
+        action = actions.get(frame % SCRIPT_LENGTH)
+        if action is not None:
+            game_state.input.push(action) # Applied at the start of the next update, like a key press
+
+        t0 = time.perf_counter()
+        game_state.update() # One simulation step per frame, no frame cap
+        t1 = time.perf_counter()
+        update_time += t1 - t0
+
+        if not sim_only:
+            game_state.draw(screen)
+            t2 = time.perf_counter()
+            blits += game_state.render_list.submitted
+            if textures is not None:
+                textures.present()
+            else:
+                pygame.display.flip()
+            t3 = time.perf_counter()
+            draw_time += t2 - t1
+            present_time += t3 - t2
+    total_time = time.perf_counter() - start
+
+    results = {
+        'frames': frames,
+        'sim_only': sim_only,
+        'backend': backend,
+        'entities': num_entities,
+        'total_s': total_time,
+        'fps': frames / total_time if total_time > 0 else 0.0,
+        'update_ms': update_time * 1000 / frames,
+        'draw_ms': draw_time * 1000 / frames,
+        'present_ms': present_time * 1000 / frames,
+        'blits_per_frame': blits / frames,
+        # Final state, so runs can be compared for determinism
+        'player': [player.rect.x, player.rect.y, player.change_x, player.change_y, player.on_ground],
+    }
+    if textures is not None:
+        results['texture_uploads'] = textures.uploads
+        textures.close()
+    pygame.quit()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless game benchmark")
+    parser.add_argument('--frames', type=int, default=3000, help="number of frames to run")
+    parser.add_argument('--sim-only', action='store_true', help="skip drawing, only run the simulation")
+    parser.add_argument('--entities', type=int, default=0, help="number of batch entities to spawn")
+    parser.add_argument('--backend', choices=('surface', 'texture'), default='surface', help="render backend to draw with")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    if args.backend == 'texture' and not texture_renderer.available():
+        parser.error("the texture backend needs pygame._sdl2")
+    if args.entities and game.entities is None:
+        parser.error("--entities needs NumPy, which is not installed")
+    results = run(args.frames, args.sim_only, args.entities, args.backend)
+
+    if args.json:
+        print(json.dumps(results))
+        return
+
+    mode = "sim only" if results['sim_only'] else "sim + draw"
+    if results['entities']:
+        mode += f", {results['entities']} entities"
+    if results['backend'] != 'surface':
+        mode += f", {results['backend']} backend"
+    print(f"{results['frames']} frames ({mode}) in {results['total_s']:.3f} s -> {results['fps']:.1f} FPS")
+    print(f"  update:  {results['update_ms']:.4f} ms/frame")
+    if not results['sim_only']:
+        print(f"  draw:    {results['draw_ms']:.4f} ms/frame")
+        print(f"  present: {results['present_ms']:.4f} ms/frame")
+        print(f"  blits:   {results['blits_per_frame']:.1f} per frame")
+        if 'texture_uploads' in results:
+            print(f"  uploads: {results['texture_uploads']} textures")
+    print(f"  final player state: {results['player']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+# camera.py
+import pygame
+import settings # Import settings module
+
+class Camera:
+    def __init__(self, width, height):
+        """ Initialize camera viewing a width x height window of the world """
+        # Top-left corner of the view in world coordinates
+        self.x = 0
+        self.y = 0
+
+        self.width = width
+        self.height = height
+
+    def follow(self, target_rect):
+        """ Scroll horizontally so the target stays at the camera anchor """
+        self.x = target_rect.centerx - settings.CAMERA_ANCHOR_X
+
+    def apply(self, rect):
+        """ Convert a world-space rect to screen space """
+        return rect.move(-self.x, -self.y)
+
+    def view_rect(self):
+        """ The area of the world currently in view """
+        return pygame.Rect(self.x, self.y, self.width, self.height)
+
+
+class CameraGroup(pygame.sprite.Group):
+    def __init__(self, *sprites, bucket_width=None):
+        """ Sprite group that only draws what a Camera can see.
+
+        Sprites are indexed in vertical world columns bucket_width pixels wide, so finding the
+        visible ones only looks at the few columns the view covers, not at every sprite.
+        """
+        self.bucket_width = bucket_width or settings.CULL_BUCKET_WIDTH
+        self.buckets = {} # Column index -> set of sprites overlapping that column
+        self.sprite_columns = {} # Sprite -> range of columns it is listed in
+        self.draw_order = {} # Sprite -> sequence number, so culled sprites still draw in the order added
+        self.next_order = 0
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        self.draw_order[sprite] = self.next_order
+        self.next_order += 1
+        self.reindex(sprite)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.unindex(sprite)
+        del self.draw_order[sprite]
+
+    def column_range(self, left, right):
+        """ Range of columns the world X span [left, right) overlaps """
+        width = self.bucket_width
+        return range(left // width, (right - 1) // width + 1)
+
+    def sprite_span(self, sprite):
+        """ World X span a sprite can be drawn in before its next step """
+        rect = sprite.rect
+        left, right = rect.left, rect.right
+        # Rendering interpolates from the previous position, so cover the whole move
+        previous_pos = getattr(sprite, 'previous_pos', None)
+        if previous_pos is not None:
+            left = min(left, previous_pos[0])
+            right = max(right, previous_pos[0] + rect.width)
+        return left, right
+
+    def reindex(self, sprite):
+        """ Move a sprite to the columns it covers now (call after moving it outside update()) """
+        columns = self.column_range(*self.sprite_span(sprite))
+        if columns == self.sprite_columns.get(sprite):
+            return # Still in the same columns, which is the usual case
+        self.unindex(sprite)
+        for column in columns:
+            self.buckets.setdefault(column, set()).add(sprite)
+        self.sprite_columns[sprite] = columns
+
+    def unindex(self, sprite):
+        """ Remove a sprite from every column it is listed in """
+        for column in self.sprite_columns.pop(sprite, ()):
+            bucket = self.buckets.get(column)
+            if bucket is not None:
+                bucket.discard(sprite)
+                if not bucket:
+                    del self.buckets[column] # Keep the index sparse
+
+    def update(self, *args, **kwargs):
+        """ Update every sprite, then re-file the ones that moved to other columns """
+        super().update(*args, **kwargs)
+        for sprite in self.sprites():
+            self.reindex(sprite)
+
+    def visible(self, camera, alpha=1.0):
+        """ Return (sprite, screen rect) for each sprite in the camera's view, in draw order """
+        view = camera.view_rect()
+        found = set()
+        for column in self.column_range(view.left, view.right):
+            bucket = self.buckets.get(column)
+            if bucket is not None:
+                found.update(bucket) # A sprite spanning several columns is in each of them
+
+        visible = []
+        for sprite in sorted(found, key=self.draw_order.__getitem__):
+            render_rect = sprite.get_render_rect(alpha) if hasattr(sprite, 'get_render_rect') else sprite.rect
+            if view.colliderect(render_rect):
+                visible.append((sprite, camera.apply(render_rect)))
+        return visible
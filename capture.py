@@ -0,0 +1,243 @@
+# capture.py
+# Gameplay capture: records what is shown on screen while playing, for QA and bug reports.
+#
+# Right after each present the main loop copies the screen's pixels into one of a few buffers
+# allocated up front and hands it to a writer thread through a bounded queue, so the frame
+# only pays for a memory copy. The writer compresses the frame and appends it to the file,
+# then gives the buffer back. When every buffer is still waiting to be written the frame is
+# dropped, or with CAPTURE_WHEN_BEHIND = 'block' the loop waits for one and the wait is counted.
+#
+# Formats (settings.CAPTURE_FORMAT):
+#   'gxcap' - zlib-compressed frames; turn them into PNGs with  python capture.py session.gxcap --png out/
+#   'raw'   - the pixels as they are, one frame after another, for ffmpeg -f rawvideo
+#             (the exact command is printed when capture stops)
+#
+# gxcap layout (little-endian):
+#   header : magic b'GXCP', version, width, height, pitch, bytes per pixel, R G B A masks
+#   frames : (frame number uint32, seconds since start double, compressed size uint32, zlib data)
+#            Frame numbers count every presented frame, so dropped frames show up as gaps.
+import os
+import sys
+import time
+import zlib
+import queue
+import struct
+import argparse
+import threading
+import pygame
+import settings # Import settings module
+
+CAPTURE_HEADER = struct.Struct('<4sHHHHB4I')
+FRAME_HEADER = struct.Struct('<IdI')
+CAPTURE_MAGIC = b'GXCP'
+CAPTURE_VERSION = 1
+
+FORMATS = ('gxcap', 'raw')
+
+# ffmpeg pixel formats for 32-bit surfaces, by (R, G, B, A) masks (bytes in memory are little-endian)
+RAWVIDEO_PIXEL_FORMATS = {
+    (0xff0000, 0xff00, 0xff, 0): 'bgr0',
+    (0xff0000, 0xff00, 0xff, 0xff000000): 'bgra',
+    (0xff, 0xff00, 0xff0000, 0): 'rgb0',
+    (0xff, 0xff00, 0xff0000, 0xff000000): 'rgba',
+}
+
+
+class FrameCapture:
+    def __init__(self, path, surface, capture_format=None, num_buffers=None, when_behind=None):
+        """ Capture frames of surface's size and pixel format to path; frames are passed to grab() """
+        self.path = path
+        self.format = capture_format or settings.CAPTURE_FORMAT
+        self.when_behind = when_behind or settings.CAPTURE_WHEN_BEHIND
+        if self.format not in FORMATS:
+            raise ValueError(f"unknown capture format {self.format!r}")
+        if self.when_behind not in ('drop', 'block'):
+            raise ValueError(f"CAPTURE_WHEN_BEHIND must be 'drop' or 'block', got {self.when_behind!r}")
+
+        self.size = surface.get_size()
+        self.pitch = surface.get_pitch()
+        self.bytesize = surface.get_bytesize()
+        self.masks = tuple(surface.get_masks())
+
+        # Frame buffers, allocated once and passed back and forth between the loop and the writer
+        num_buffers = num_buffers or settings.CAPTURE_BUFFERS
+        self.free = queue.SimpleQueue() # Buffers ready to be filled
+        for _ in range(num_buffers):
+            self.free.put(bytearray(self.pitch * self.size[1]))
+        self.pending = queue.Queue(maxsize=num_buffers) # Filled buffers waiting for the writer
+
+        self.file = open(path, 'wb')
+        if self.format == 'gxcap':
+            self.file.write(CAPTURE_HEADER.pack(CAPTURE_MAGIC, CAPTURE_VERSION, self.size[0], self.size[1],
+                                                self.pitch, self.bytesize, *self.masks))
+
+        # Counters (the written ones are only updated by the writer thread)
+        self.frames = 0 # Frames passed to grab()
+        self.written = 0 # Frames written to the file
+        self.dropped = 0 # Frames skipped because no buffer was free (or the screen changed size)
+        self.stalls = 0 # Frames that waited for a buffer ('block')
+        self.stalled_ms = 0.0 # Total time spent waiting
+        self.bytes_written = 0
+        self.error = None # Write error that stopped the writer
+
+        self.start = time.perf_counter()
+        self.writer = threading.Thread(target=self.write_frames, name='frame-capture', daemon=True)
+        self.writer.start()
+
+    def grab(self, surface):
+        """ Copy surface's pixels into a free buffer and queue it for writing (call right after presenting).
+
+        Returns False if the frame was dropped.
+        """
+        frame_number = self.frames
+        self.frames += 1
+        if self.error is not None or surface.get_size() != self.size or surface.get_pitch() != self.pitch:
+            # The stream has one frame size, so frames after a window resize are not captured
+            self.dropped += 1
+            return False
+
+        try:
+            buffer = self.free.get_nowait()
+        except queue.Empty:
+            if self.when_behind == 'drop':
+                self.dropped += 1
+                return False
+            # Backpressure: wait for the writer to finish a frame
+            wait_start = time.perf_counter()
+            buffer = self.free.get()
+            self.stalls += 1
+            self.stalled_ms += (time.perf_counter() - wait_start) * 1000
+
+        # One memory copy; the surface stays locked only while its buffer is being read
+        buffer[:] = memoryview(surface.get_buffer())
+        self.pending.put((buffer, frame_number, time.perf_counter() - self.start))
+        return True
+
+    def write_frames(self):
+        """ Writer thread: compress and write queued frames, handing their buffers back """
+        row_bytes = self.size[0] * self.bytesize
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            buffer, frame_number, timestamp = item
+            if self.error is None:
+                try:
+                    if self.format == 'gxcap':
+                        # zlib releases the GIL while compressing, so the game loop keeps running
+                        data = zlib.compress(buffer, settings.CAPTURE_COMPRESSION_LEVEL)
+                        self.file.write(FRAME_HEADER.pack(frame_number, timestamp, len(data)))
+                        self.file.write(data)
+                        self.bytes_written += FRAME_HEADER.size + len(data)
+                    else:
+                        self.write_raw(buffer, row_bytes)
+                        self.bytes_written += row_bytes * self.size[1]
+                    self.written += 1
+                except OSError as e:
+                    self.error = e # Reported by close(); later frames are dropped
+            self.free.put(buffer)
+
+    def write_raw(self, buffer, row_bytes):
+        """ Append a frame's pixels without the row padding a surface's pitch may add """
+        if row_bytes == self.pitch:
+            self.file.write(buffer)
+            return
+        view = memoryview(buffer)
+        for row_start in range(0, self.pitch * self.size[1], self.pitch):
+            self.file.write(view[row_start:row_start + row_bytes])
+
+    def stats(self):
+        """ Frame counts and how far capture fell behind """
+        return {
+            'frames': self.frames,
+            'written': self.written,
+            'dropped': self.dropped,
+            'stalls': self.stalls,
+            'stalled_ms': self.stalled_ms,
+            'bytes': self.bytes_written,
+        }
+
+    def close(self):
+        """ Write the frames still queued, close the file and print a summary """
+        self.pending.put(None)
+        self.writer.join()
+        self.file.close()
+
+        print(f"Captured {self.written} of {self.frames} frames to {self.path} "
+              f"({self.bytes_written / (1024 * 1024):.1f} MB, {self.dropped} dropped, "
+              f"{self.stalls} waited {self.stalled_ms:.1f} ms)")
+        if self.error is not None:
+            print(f"Warning: capture stopped writing after an error: {self.error}")
+        if self.format == 'raw':
+            pixel_format = RAWVIDEO_PIXEL_FORMATS.get(self.masks) if self.bytesize == 4 else None
+            if pixel_format is None:
+                print(f"Raw frames are {self.size[0]}x{self.size[1]}, {self.bytesize} bytes per pixel, masks {self.masks}")
+            else:
+                rate = settings.RENDER_FPS or settings.FPS
+                print(f"Encode with: ffmpeg -f rawvideo -pix_fmt {pixel_format} -s {self.size[0]}x{self.size[1]} "
+                      f"-r {rate} -i {self.path} capture.mp4")
+
+
+def read_capture(path):
+    """ Yield (frame number, seconds, surface) for every frame of a gxcap file """
+    with open(path, 'rb') as f:
+        header = f.read(CAPTURE_HEADER.size)
+        if len(header) < CAPTURE_HEADER.size:
+            raise ValueError(f"{path} is not a capture file")
+        magic, version, width, height, pitch, bytesize, *masks = CAPTURE_HEADER.unpack(header)
+        if magic != CAPTURE_MAGIC or version != CAPTURE_VERSION:
+            raise ValueError(f"{path} is not a capture file")
+
+        row_bytes = width * bytesize
+        while True:
+            frame_header = f.read(FRAME_HEADER.size)
+            if len(frame_header) < FRAME_HEADER.size:
+                return # End of the file (or a frame cut short when the game was killed)
+            frame_number, timestamp, size = FRAME_HEADER.unpack(frame_header)
+            data = f.read(size)
+            if len(data) < size:
+                return
+            pixels = zlib.decompress(data)
+
+            # A surface in the captured pixel format, filled row by row (pitches may differ)
+            surface = pygame.Surface((width, height), 0, bytesize * 8, masks)
+            target = surface.get_buffer()
+            target_pitch = surface.get_pitch()
+            for row in range(height):
+                target.write(pixels[row * pitch:row * pitch + row_bytes], row * target_pitch)
+            del target # Unlock the surface
+            yield frame_number, timestamp, surface
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect a gameplay capture or convert it to PNG images")
+    parser.add_argument('path', help="capture written with CAPTURE_PATH and CAPTURE_FORMAT = 'gxcap'")
+    parser.add_argument('--png', metavar='DIR', help="write every frame to DIR as frame_NNNNNN.png")
+    args = parser.parse_args()
+
+    if args.png:
+        os.makedirs(args.png, exist_ok=True)
+    count = 0
+    first = last = None
+    expected = 0
+    gaps = 0
+    try:
+        for frame_number, timestamp, surface in read_capture(args.path):
+            if frame_number != expected:
+                gaps += frame_number - expected
+            expected = frame_number + 1
+            first = timestamp if first is None else first
+            last = timestamp
+            count += 1
+            if args.png:
+                pygame.image.save(surface, os.path.join(args.png, f"frame_{frame_number:06d}.png"))
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    duration = (last - first) if count > 1 else 0.0
+    print(f"{count} frames over {duration:.2f} s, {gaps} dropped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+# collision.py
+import pygame
+import settings # Import settings module
+
+class SpatialGrid:
+    def __init__(self, cell_size=None):
+        """ Uniform grid spatial hash of solid level rects (platforms, walls, tiles) """
+        self.cell_size = cell_size or settings.COLLISION_CELL_SIZE
+        self.cells = {} # (cell_x, cell_y) -> list of solid rects overlapping that cell
+        self.count = 0 # Number of solids in the grid
+        self.revision = 0 # Incremented on every add/remove, so renderers can tell the level changed
+
+    def cell_range(self, rect):
+        """ Range of cell columns and rows a rect overlaps """
+        size = self.cell_size
+        # right/bottom are exclusive, so a rect ending exactly on a cell edge stays out of the next cell
+        return (range(rect.left // size, (rect.right - 1) // size + 1),
+                range(rect.top // size, (rect.bottom - 1) // size + 1))
+
+    def add(self, rect):
+        """ Add a solid rect to every cell it overlaps """
+        rect = pygame.Rect(rect)
+        columns, rows = self.cell_range(rect)
+        for cell_x in columns:
+            for cell_y in rows:
+                self.cells.setdefault((cell_x, cell_y), []).append(rect)
+        self.count += 1
+        self.revision += 1
+        return rect
+
+    def remove(self, rect):
+        """ Remove a solid rect previously added (the one add() returned, not an equal rect) """
+        columns, rows = self.cell_range(rect)
+        for cell_x in columns:
+            for cell_y in rows:
+                cell = self.cells.get((cell_x, cell_y))
+                if cell is None:
+                    continue
+                # Match by identity: equal rects may have been added separately, and Rect == compares by value
+                for i, solid in enumerate(cell):
+                    if solid is rect:
+                        del cell[i]
+                        break
+                if not cell:
+                    del self.cells[(cell_x, cell_y)] # Keep the grid sparse
+        self.count -= 1
+        self.revision += 1
+
+    def query(self, rect):
+        """ Return the solids overlapping rect, testing only the cells it covers """
+        found = []
+        seen = set() # A solid spanning several cells is listed in each of them
+        columns, rows = self.cell_range(rect)
+        for cell_x in columns:
+            for cell_y in rows:
+                cell = self.cells.get((cell_x, cell_y))
+                if cell is None:
+                    continue
+                for solid in cell:
+                    if id(solid) not in seen and rect.colliderect(solid):
+                        seen.add(id(solid))
+                        found.append(solid)
+        return found
+
+    def resolve_x(self, rect, start_x):
+        """ Resolve a horizontal move of rect from start_x to rect.x against the solids.
+
+        The whole swept area is tested, so fast movers cannot tunnel through thin walls.
+        Returns -1 if stopped by a wall on the left, 1 on the right, 0 if the move was clear.
+        """
+        end_x = rect.x
+        if end_x == start_x:
+            return 0
+
+        start = rect.copy()
+        start.x = start_x
+        swept = start.union(rect)
+
+        hit = 0
+        for solid in self.query(swept):
+            if end_x > start_x and solid.left >= start.right:
+                # Moving right into the solid's left face
+                if solid.left < rect.right:
+                    rect.right = solid.left
+                    hit = 1
+            elif end_x < start_x and solid.right <= start.left:
+                # Moving left into the solid's right face
+                if solid.right > rect.left:
+                    rect.left = solid.right
+                    hit = -1
+        return hit
+
+    def resolve_y(self, rect, start_y):
+        """ Resolve a vertical move of rect from start_y to rect.y against the solids.
+
+        Returns 1 if the rect landed on top of a solid, -1 if it hit one from below, 0 if clear.
+        """
+        end_y = rect.y
+        if end_y == start_y:
+            return 0
+
+        start = rect.copy()
+        start.y = start_y
+        swept = start.union(rect)
+
+        hit = 0
+        for solid in self.query(swept):
+            if end_y > start_y and solid.top >= start.bottom:
+                # Falling onto the solid's top face
+                if solid.top < rect.bottom:
+                    rect.bottom = solid.top
+                    hit = 1
+            elif end_y < start_y and solid.bottom <= start.top:
+                # Rising into the solid's bottom face
+                if solid.bottom > rect.top:
+                    rect.top = solid.bottom
+                    hit = -1
+        return hit
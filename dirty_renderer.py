@@ -0,0 +1,81 @@
+# dirty_renderer.py
+import pygame
+
+class ScreenSprite(pygame.sprite.DirtySprite):
+    def __init__(self, source):
+        """ Screen-space stand-in for a world-space sprite, drawn by LayeredDirty """
+        super().__init__()
+        self.source = source # The game sprite this one mirrors
+        self.image = source.image
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.dirty = 1 # Draw on the first frame
+
+    def sync(self, screen_rect):
+        """ Follow the source sprite, flagging this sprite dirty only if it moved or changed image """
+        if screen_rect != self.rect or self.source.image is not self.image:
+            self.image = self.source.image
+            self.rect = screen_rect
+            self.dirty = 1 # LayeredDirty clears the old rect and draws the new one
+
+
+class DirtyRenderer:
+    def __init__(self, game_state, screen):
+        """ Initialize dirty-rect renderer for the given game """
+        self.game_state = game_state
+
+        # LayeredDirty tracks which screen areas changed and returns them from draw()
+        self.group = pygame.sprite.LayeredDirty()
+        self.screen_sprites = {} # Game sprite -> ScreenSprite
+
+        # Scenery (background layers and level geometry) as seen from the current camera position,
+        # used to clear behind sprites. The static layers come from BackgroundManager's cached composite.
+        self.background = pygame.Surface(screen.get_size()).convert()
+        self.background_key = None # (camera X, background revision, level revision) it was rendered for
+
+    def invalidate(self):
+        """ Repaint the whole screen next frame, e.g. after something outside the group drew over it """
+        self.background_key = None
+
+    def sync_sprites(self, alpha):
+        """ Mirror the game's sprites into the LayeredDirty group in screen coordinates """
+        camera = self.game_state.camera
+        for sprite in self.game_state.all_sprites:
+            screen_sprite = self.screen_sprites.get(sprite)
+            if screen_sprite is None:
+                screen_sprite = ScreenSprite(sprite)
+                self.screen_sprites[sprite] = screen_sprite
+                self.group.add(screen_sprite)
+            screen_sprite.sync(camera.apply(sprite.get_render_rect(alpha)))
+
+        # Drop stand-ins for sprites that left the game (their old area gets cleared)
+        for sprite in [s for s in self.screen_sprites if not s.alive()]:
+            self.screen_sprites.pop(sprite).kill()
+
+    def draw(self, surface, alpha=1.0):
+        """ Draw the frame and return the list of screen rects that changed """
+        game_state = self.game_state
+        game_state.follow_camera(alpha)
+
+        entities = game_state.entities
+        if entities is not None and entities.count:
+            # The entity batch is drawn in one blits() call, not as dirty sprites,
+            # so while any entities are alive fall back to full-screen frames
+            game_state.draw(surface, alpha)
+            self.background_key = None # Repaint everything once entities are gone
+            return [surface.get_rect()]
+
+        self.sync_sprites(alpha)
+
+        key = (game_state.camera.x, game_state.bg_manager.revision, game_state.level.revision)
+        if key != self.background_key or self.background.get_size() != surface.get_size():
+            # Camera moved (or layers/level changed): every background pixel may have changed,
+            # so rebuild the clear surface and repaint the whole screen this frame
+            if self.background.get_size() != surface.get_size():
+                self.background = pygame.Surface(surface.get_size()).convert()
+            game_state.draw_scenery(self.background)
+            self.background_key = key
+
+            self.group.clear(surface, self.background)
+            self.group.repaint_rect(surface.get_rect())
+
+        return self.group.draw(surface)
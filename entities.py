@@ -0,0 +1,196 @@
+# entities.py
+# Batch entity store for enemies, projectiles and pickups.
+# State lives in NumPy arrays (structure of arrays) so a whole batch is integrated in a
+# few vectorized operations, and queued on the frame's render list as one batch.
+import random
+import numpy as np
+import pygame
+import settings # Import settings module
+
+# Entity kinds: (name, size, colour)
+KIND_ENEMY = 0
+KIND_PROJECTILE = 1
+KIND_PICKUP = 2
+ENTITY_KINDS = [
+    ('enemy', (30, 30), (200, 60, 60)),
+    ('projectile', (8, 4), (255, 220, 120)),
+    ('pickup', (16, 16), (240, 200, 40)),
+]
+
+# Flag bits
+FLAG_ON_GROUND = 1
+FLAG_NO_GRAVITY = 2 # e.g. projectiles fly straight
+
+NO_OWNER = -1 # Owner of entities not spawned from a world chunk
+
+# One entity in a snapshot record (see snapshot.py), little-endian and unpadded
+SNAPSHOT_ROW = np.dtype([('pos', '<f8', 2), ('vel', '<f8', 2), ('kind', 'u1'), ('flags', 'u1'), ('owner', '<i4')])
+
+
+class EntityBatch:
+    def __init__(self, capacity=256):
+        """ Initialize an empty batch with room for capacity entities (grows as needed) """
+        self.count = 0 # Live entities occupy indices [0, count)
+        self.pos = np.zeros((capacity, 2), dtype=np.float64) # x, y of the top-left corner
+        self.vel = np.zeros((capacity, 2), dtype=np.float64) # change_x, change_y per step
+        self.kind = np.zeros(capacity, dtype=np.uint8)
+        self.flags = np.zeros(capacity, dtype=np.uint8)
+        self.owner = np.full(capacity, NO_OWNER, dtype=np.int32) # World chunk that spawned it
+
+        # Per-kind lookup tables, indexed by self.kind
+        self.kind_heights = np.array([size[1] for _, size, _ in ENTITY_KINDS], dtype=np.float64)
+        self.kind_widths = np.array([size[0] for _, size, _ in ENTITY_KINDS], dtype=np.float64)
+        self.images = []
+        for _, size, colour in ENTITY_KINDS:
+            image = pygame.Surface(size).convert()
+            image.fill(colour)
+            self.images.append(image)
+        self.scaled_images = {} # render_scale -> per-kind images at that scale
+
+    def grow(self):
+        """ Double the capacity of every array """
+        capacity = len(self.pos) * 2
+        for name in ('pos', 'vel', 'kind', 'flags', 'owner'):
+            old = getattr(self, name)
+            new = np.full((capacity,) + old.shape[1:], NO_OWNER if name == 'owner' else 0, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def spawn(self, kind, x, y, change_x=0.0, change_y=0.0, flags=0, owner=NO_OWNER):
+        """ Add an entity and return its index """
+        if self.count == len(self.pos):
+            self.grow()
+        i = self.count
+        self.pos[i] = (x, y)
+        self.vel[i] = (change_x, change_y)
+        self.kind[i] = kind
+        self.flags[i] = flags
+        self.owner[i] = owner
+        self.count += 1
+        return i
+
+    def spawn_records(self, records, owner):
+        """ Spawn (kind, x, y, flags) records from level data, skipping kinds this batch does not know """
+        for kind, x, y, flags in records:
+            if kind >= len(ENTITY_KINDS):
+                print(f"Warning: ignoring entity of unknown kind {kind}")
+                continue
+            self.spawn(kind, x, y, flags=flags, owner=owner)
+
+    def kill_owned(self, owner):
+        """ Remove every entity spawned with the given owner """
+        # Highest index first, so the entity kill() moves down is never one still to be removed
+        for i in np.flatnonzero(self.owner[:self.count] == owner)[::-1].tolist():
+            self.kill(i)
+
+    def kill(self, i):
+        """ Remove entity i by moving the last entity into its slot (indices are not stable) """
+        last = self.count - 1
+        if i != last:
+            self.pos[i] = self.pos[last]
+            self.vel[i] = self.vel[last]
+            self.kind[i] = self.kind[last]
+            self.flags[i] = self.flags[last]
+            self.owner[i] = self.owner[last]
+        self.count = last
+
+    def owners(self):
+        """ World chunk indices that live entities were spawned from """
+        return set(np.unique(self.owner[:self.count]).tolist()) - {NO_OWNER}
+
+    def pack_rows(self, buffer, offset, capacity):
+        """ Write the live entities as SNAPSHOT_ROW rows into buffer at offset (count must be <= capacity) """
+        n = self.count
+        rows = np.frombuffer(buffer, SNAPSHOT_ROW, capacity, offset) # A view, so this writes into buffer
+        rows['pos'][:n] = self.pos[:n]
+        rows['vel'][:n] = self.vel[:n]
+        rows['kind'][:n] = self.kind[:n]
+        rows['flags'][:n] = self.flags[:n]
+        rows['owner'][:n] = self.owner[:n]
+
+    def check_rows(self, buffer, offset, count):
+        """ Read count SNAPSHOT_ROW rows from buffer, raising ValueError if any cannot be restored """
+        rows = np.frombuffer(buffer, SNAPSHOT_ROW, count, offset)
+        if count and (rows['kind'] >= len(ENTITY_KINDS)).any():
+            raise ValueError("snapshot has an entity of unknown kind")
+        if count and not np.isfinite(rows['pos']).all():
+            raise ValueError("snapshot has an entity at an invalid position")
+        return rows
+
+    def restore_rows(self, rows):
+        """ Replace every entity with the rows from check_rows() """
+        n = len(rows)
+        while len(self.pos) < n:
+            self.grow()
+        self.pos[:n] = rows['pos']
+        self.vel[:n] = rows['vel']
+        self.kind[:n] = rows['kind']
+        self.flags[:n] = rows['flags']
+        self.owner[:n] = rows['owner']
+        self.count = n
+
+    def spawn_random(self, n, center_x, seed=0):
+        """ Scatter n walking enemies and pickups around center_x (for demos and benchmarks) """
+        rng = random.Random(seed)
+        for _ in range(n):
+            kind = rng.choice((KIND_ENEMY, KIND_PICKUP))
+            x = center_x + rng.uniform(-2000, 2000)
+            y = rng.uniform(0, settings.VISIBLE_GROUND_Y - 100)
+            change_x = rng.uniform(-3, 3) if kind == KIND_ENEMY else 0.0
+            self.spawn(kind, x, y, change_x)
+
+    def update(self):
+        """ Integrate every entity for one simulation step, with gravity and ground clamping """
+        n = self.count
+        if n == 0:
+            return
+        pos = self.pos[:n]
+        vel = self.vel[:n]
+        flags = self.flags[:n]
+        change_y = vel[:, 1]
+
+        # Same gravity rule as Player.apply_gravity: start falling at 1, then accelerate by GRAVITY
+        falls = (flags & FLAG_NO_GRAVITY) == 0
+        change_y[:] = np.where(falls, np.where(change_y == 0, 1.0, change_y + settings.GRAVITY), change_y)
+
+        pos += vel
+
+        # Snap anything that reached the ground line back onto it
+        ground_top = settings.VISIBLE_GROUND_Y - self.kind_heights[self.kind[:n]]
+        landed = pos[:, 1] >= ground_top
+        pos[:, 1] = np.where(landed, ground_top, pos[:, 1])
+        change_y[landed] = 0
+        flags[:] = np.where(landed, flags | FLAG_ON_GROUND, flags & (0xFF ^ FLAG_ON_GROUND))
+
+    def visible_blits(self, camera, render_scale=1.0):
+        """ (image, screen position) for every on-screen entity """
+        n = self.count
+        if n == 0:
+            return []
+        pos = self.pos[:n]
+        kinds = self.kind[:n]
+
+        # Cull to the camera view before building the blit list
+        screen_x = pos[:, 0] - camera.x
+        screen_y = pos[:, 1] - camera.y
+        visible = ((screen_x + self.kind_widths[kinds] > 0) & (screen_x < camera.width)
+                   & (screen_y + self.kind_heights[kinds] > 0) & (screen_y < camera.height))
+        if not visible.any():
+            return []
+
+        images = self.images_at_scale(render_scale)
+        xs = np.rint(screen_x[visible] * render_scale).astype(np.int32).tolist()
+        ys = np.rint(screen_y[visible] * render_scale).astype(np.int32).tolist()
+        return [(images[k], (x, y)) for k, x, y in zip(kinds[visible].tolist(), xs, ys)]
+
+    def images_at_scale(self, render_scale):
+        """ Per-kind images scaled for the framebuffer, built once per scale """
+        if render_scale == 1.0:
+            return self.images
+        images = self.scaled_images.get(render_scale)
+        if images is None:
+            images = [pygame.transform.scale(image, (max(1, round(image.get_width() * render_scale)),
+                                                     max(1, round(image.get_height() * render_scale))))
+                      for image in self.images]
+            self.scaled_images[render_scale] = images
+        return images
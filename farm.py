@@ -0,0 +1,180 @@
+# farm.py
+# Simulation farm: runs many independent headless game instances on a process pool, each with
+# its own settings overrides and scripted input, for parameter sweeps and bot-driven testing.
+# Every instance returns the player's state after each simulation step as compact arrays.
+#
+# Usage:
+#   python farm.py --set GRAVITY=0.3,0.35,0.4 --set PLAYER_JUMP_POWER=9,10,11
+#   python farm.py --inputs session.gxin --set PLAYER_SPEED=4,5,6 --workers 4
+#   python farm.py --set GRAVITY=0.3,0.4 --json      # machine-readable summaries
+import os
+import ast
+import time
+import json
+import argparse
+import itertools
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import pygame
+import settings # Import settings module
+import game # Import game module
+import replay # Import input recording module
+import benchmark # Import benchmark module (its scripted input is the default here)
+
+
+def repeat_script(script, length, steps):
+    """ Repeat a looping (step, action) script to cover the given number of steps """
+    return [(start + step, action)
+            for start in range(0, steps, length)
+            for step, action in script if start + step < steps]
+
+
+def init_worker():
+    """ Prepare a process to run headless instances (no window, no audio) """
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    pygame.display.init()
+    pygame.display.set_mode((settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT)) # Needed to convert images
+
+
+def simulate(overrides, script, steps):
+    """ Run one headless instance for the given number of steps.
+
+    overrides maps settings names to values for this instance only (values derived from them
+    in settings.py at import are not recomputed). script is a list of (step, action) in step
+    order. Returns the per-step player state as arrays, plus the overrides used.
+    """
+    previous = {name: getattr(settings, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    try:
+        game_state = game.Game()
+        player = game_state.player
+
+        xs = array('i')
+        ys = array('i')
+        speeds_x = array('d')
+        speeds_y = array('d')
+        on_ground = bytearray()
+
+        next_action = 0
+        for step in range(steps):
+            # Queue this step's actions the same way replay.py does
+            while next_action < len(script) and script[next_action][0] == step:
+                game_state.input.push(script[next_action][1])
+                next_action += 1
+            game_state.update()
+
+            xs.append(player.rect.x)
+            ys.append(player.rect.y)
+            speeds_x.append(player.change_x)
+            speeds_y.append(player.change_y)
+            on_ground.append(player.on_ground)
+
+        game_state.close() # Images stay pooled for the next instance in this process
+    finally:
+        # Worker processes are reused, so leave settings as they were for the next instance
+        for name, value in previous.items():
+            setattr(settings, name, value)
+
+    return {
+        'overrides': overrides,
+        'x': xs,
+        'y': ys,
+        'change_x': speeds_x,
+        'change_y': speeds_y,
+        'on_ground': bytes(on_ground),
+    }
+
+
+def simulate_job(job):
+    """ simulate() taking one (overrides, script, steps) tuple, for executor.map """
+    return simulate(*job)
+
+
+def run_farm(jobs, workers=None):
+    """ Run (overrides, script, steps) jobs across a process pool; results come back in job order.
+
+    workers=0 runs them one after another in this process (handy for debugging).
+    """
+    if workers == 0:
+        init_worker()
+        return [simulate_job(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+        # Jobs are tiny to send and results compact, so batching several per task keeps overhead low
+        chunksize = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 4))
+        return list(executor.map(simulate_job, jobs, chunksize=chunksize))
+
+
+def sweep(grid, script, steps):
+    """ One job for every combination of the values in grid (settings name -> list of values) """
+    names = list(grid)
+    return [(dict(zip(names, values)), script, steps) for values in itertools.product(*grid.values())]
+
+
+def summarize(result):
+    """ A few numbers describing one instance's run """
+    ys = result['y']
+    airborne = result['on_ground'].count(0)
+    return {
+        'overrides': result['overrides'],
+        'steps': len(ys),
+        'final': [result['x'][-1], ys[-1], result['change_x'][-1], result['change_y'][-1], bool(result['on_ground'][-1])] if ys else None,
+        'highest_y': min(ys) if ys else None, # Screen Y grows downwards
+        'distance': sum(abs(b - a) for a, b in zip(result['x'], result['x'][1:])),
+        'airborne_steps': airborne,
+    }
+
+
+def parse_setting(text):
+    """ Parse 'NAME=value,value,...' from the command line into (NAME, [values]) """
+    name, sep, values = text.partition('=')
+    if not sep or not hasattr(settings, name):
+        raise argparse.ArgumentTypeError(f"expected NAME=v1,v2,... with NAME in settings.py, got {text!r}")
+    try:
+        return name, [ast.literal_eval(value) for value in values.split(',')]
+    except (ValueError, SyntaxError):
+        raise argparse.ArgumentTypeError(f"values for {name} must be Python literals, got {values!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many headless game instances with different settings")
+    parser.add_argument('--set', type=parse_setting, action='append', default=[], metavar='NAME=V1,V2',
+                        help="settings values to sweep (repeat for a grid of every combination)")
+    parser.add_argument('--steps', type=int, default=None, help="simulation steps per instance (default 1200, or the recording's length)")
+    parser.add_argument('--inputs', help="use the actions of an input recording instead of the default script")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: one per core, 0 = run in this process)")
+    parser.add_argument('--json', action='store_true', help="print per-instance summaries as JSON")
+    args = parser.parse_args()
+
+    if args.inputs:
+        try:
+            script, total_steps = replay.load_log(args.inputs)[1:3]
+        except ValueError as e:
+            parser.error(str(e))
+        steps = args.steps or total_steps
+        script = [(step, action) for step, action in script if step < steps]
+    else:
+        steps = args.steps or 1200
+        script = repeat_script(benchmark.SCRIPT, benchmark.SCRIPT_LENGTH, steps)
+
+    jobs = sweep(dict(args.set), script, steps)
+    start = time.perf_counter()
+    results = run_farm(jobs, args.workers)
+    elapsed = time.perf_counter() - start
+    summaries = [summarize(result) for result in results]
+
+    if args.json:
+        print(json.dumps({'seconds': elapsed, 'instances': summaries}))
+        return
+
+    print(f"{len(jobs)} instances x {steps} steps in {elapsed:.2f} s ({len(jobs) * steps / elapsed:.0f} steps/s)")
+    for summary in summaries:
+        overrides = ' '.join(f"{name}={value}" for name, value in summary['overrides'].items()) or "(defaults)"
+        print(f"  {overrides}: final {summary['final']}, highest y {summary['highest_y']}, "
+              f"distance {summary['distance']}, airborne {summary['airborne_steps']} steps")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+# framebuffer.py
+import pygame
+import settings # Import settings module
+
+class ScaledFramebuffer:
+    def __init__(self, window, render_scale):
+        """ Offscreen surface at render_scale of the logical screen, scaled up to the window once per frame """
+        self.render_scale = render_scale
+        size = (round(settings.SCREEN_WIDTH * render_scale), round(settings.SCREEN_HEIGHT * render_scale))
+        self.surface = pygame.Surface(size).convert() # Draw the frame here
+
+        self.window = None
+        self.target = None # Area of the window the frame is scaled into
+        self.resize(window)
+
+    def resize(self, window):
+        """ Fit the frame into a (new or resized) window, keeping the aspect ratio """
+        self.window = window
+        window_width, window_height = window.get_size()
+        frame_width, frame_height = self.surface.get_size()
+
+        # Largest size with the frame's aspect ratio that fits, centred (letterboxed)
+        fit = min(window_width / frame_width, window_height / frame_height)
+        target_rect = pygame.Rect(0, 0, max(1, int(frame_width * fit)), max(1, int(frame_height * fit)))
+        target_rect.center = window.get_rect().center
+
+        window.fill(settings.BLACK) # Clear the letterbox bars once; the frame area is overwritten every frame
+        # Subsurface of the window, created once so present() does not allocate
+        self.target = window.subsurface(target_rect)
+
+    def present(self):
+        """ Scale the finished frame into the window (call before display.flip) """
+        pygame.transform.scale(self.surface, self.target.get_size(), self.target)
@@ -0,0 +1,211 @@
+# game.py
+import pygame
+import settings # Import settings module
+import sprites # Import sprites module
+import background # Import background module
+import camera # Import camera module
+import collision # Import collision module
+import world # Import world module
+import profiler # Import profiler module
+import inputs # Import input module
+import render # Import render list module
+
+try:
+    import entities # Batch entity store (needs NumPy)
+except ImportError:
+    entities = None
+
+class Game:
+    def __init__(self, loader=None, render_scale=1.0):
+        """ Create the game objects (the display mode must already be set).
+
+        With an AssetLoader, images load in the background and appear as they finish.
+        render_scale is the size of the surface passed to draw() relative to the logical screen.
+        """
+        # Player input, queued as actions and applied at the start of each simulation step
+        self.input = inputs.InputQueue()
+        self.tick = 0 # Simulation steps taken so far
+
+        # Timing hooks around the draw steps (replace with a profiler.FrameProfiler to record them)
+        self.profiler = profiler.NullProfiler()
+
+        # Game logic runs in logical screen pixels; drawing is scaled by render_scale
+        self.render_scale = render_scale
+        self.scaled_images = {} # Sprite image -> copy scaled by render_scale
+        self.solid_surfaces = {} # Size -> filled surface for drawing level geometry
+
+        # Blits for the frame being drawn, submitted together in z order
+        self.render_list = render.RenderList()
+
+        # Background Manager
+        self.bg_manager = background.BackgroundManager(loader, render_scale)
+        # Loading happens automatically in __init__
+
+        # Solid level geometry, indexed in a uniform grid so collision tests only nearby cells
+        self.level = collision.SpatialGrid()
+        for solid in settings.LEVEL_SOLIDS:
+            self.level.add(solid)
+
+        # Enemies, projectiles and pickups, simulated and drawn as one batch
+        self.entities = None
+        if entities is not None:
+            self.entities = entities.EntityBatch()
+        elif settings.DEMO_ENTITY_COUNT:
+            print("Warning: NumPy is not installed, entities are disabled.")
+
+        # Chunked level data streamed in around the camera (tiles become solids in the grid,
+        # entity records join the batch)
+        self.world = world.StreamingWorld(self.level, entities=self.entities) if settings.STREAMING_WORLD else None
+        self.travel_direction = 1 # Last horizontal direction the player moved in
+
+        # Player sprite
+        self.player = sprites.Player(loader, self.level)
+
+        # Set initial player position (world coordinates)
+        # Position the player's bottom on the visible ground level
+        self.player.rect.x = settings.SCREEN_WIDTH // 4 # Start player near the left side
+        self.player.rect.bottom = settings.VISIBLE_GROUND_Y # Align player bottom to ground
+
+        # Create sprite group(s)
+        # Sprites are indexed by world column so drawing skips those outside the camera's view
+        self.all_sprites = camera.CameraGroup()
+        self.all_sprites.add(self.player)
+
+        # Camera that scrolls the world horizontally to follow the player
+        self.camera = camera.Camera(settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT)
+        self.camera.follow(self.player.rect)
+        self.stream_world()
+
+        if self.entities is not None and settings.DEMO_ENTITY_COUNT:
+            self.entities.spawn_random(settings.DEMO_ENTITY_COUNT, self.player.rect.centerx)
+
+    def close(self):
+        """ Give the player and background images back to the shared pool """
+        self.player.close()
+        self.bg_manager.close()
+
+    def handle_event(self, event):
+        """ Queue the player action (if any) for a keyboard event """
+        action = inputs.action_for_event(event)
+        if action is not None:
+            self.input.push(action)
+
+    def update(self):
+        """ Advance the simulation by one fixed step """
+        self.input.apply(self.player, self.tick)
+        self.tick += 1
+
+        self.all_sprites.update() # This updates player's position based on movement and gravity
+        if self.entities is not None:
+            self.entities.update() # Every entity in one vectorized step
+        self.stream_world()
+
+        if self.input.recorder is not None:
+            self.input.recorder.observe(self)
+
+    def stream_world(self):
+        """ Load world chunks ahead of the player and evict those left behind """
+        if self.world is None:
+            return
+        if self.player.change_x != 0:
+            self.travel_direction = 1 if self.player.change_x > 0 else -1
+        # Stream around where the camera will be after this step
+        view_left = self.player.rect.centerx - settings.CAMERA_ANCHOR_X
+        self.world.update(view_left, self.camera.width, self.travel_direction)
+
+    def follow_camera(self, alpha=1.0):
+        """ Scroll the camera to keep the (interpolated) player in view """
+        self.camera.follow(self.player.get_render_rect(alpha))
+
+    def draw(self, surface, alpha=1.0):
+        """ Draw the current frame, interpolated alpha (0..1) of the way to the latest step """
+        self.follow_camera(alpha)
+
+        # 1. Clear the screen
+        surface.fill(settings.BLACK)
+        self.profiler.mark(profiler.FILL)
+
+        # 2-5. Queue everything, then blit it in z order
+        self.queue_scenery(surface.get_size())
+        self.queue_sprites(alpha)
+        self.submit(surface)
+
+    def draw_scenery(self, surface):
+        """ Draw everything that only changes when the camera moves: background and level geometry """
+        surface.fill(settings.BLACK)
+        self.profiler.mark(profiler.FILL)
+        self.queue_scenery(surface.get_size())
+        self.submit(surface)
+
+    def submit(self, surface):
+        """ Blit the queued frame in z order with one blits() call, or one per subsystem while profiling """
+        if not self.profiler.enabled:
+            self.render_list.submit(surface)
+            return
+
+        # Each subsystem's blits are timed in its own scope, which its queueing was charged to as well
+        self.render_list.submit(surface, render.Z_LEVEL)
+        self.profiler.mark(profiler.BACKGROUND)
+        self.render_list.submit(surface, render.Z_ENTITIES)
+        self.profiler.mark(profiler.LEVEL)
+        self.render_list.submit(surface) # Entities and sprites
+        self.profiler.mark(profiler.SPRITES)
+
+    def queue_scenery(self, size):
+        """ Queue the background and level geometry for a target of the given size """
+        # 2. Background layers using the BackgroundManager (parallax scrolled by the camera)
+        self.bg_manager.queue(self.render_list, size, self.camera.x)
+        self.profiler.mark(profiler.BACKGROUND)
+
+        # 3. The level geometry that is in view
+        for solid in self.level.query(self.camera.view_rect()):
+            screen_rect = self.camera.apply(solid)
+            if self.render_scale != 1.0:
+                scale = self.render_scale
+                screen_rect = pygame.Rect(round(screen_rect.x * scale), round(screen_rect.y * scale),
+                                          round(screen_rect.width * scale), round(screen_rect.height * scale))
+            self.render_list.push(self.solid_surface(screen_rect.size), screen_rect.topleft, None, render.Z_LEVEL)
+        self.profiler.mark(profiler.LEVEL)
+
+    def queue_sprites(self, alpha):
+        """ Queue the moving things, drawn on top of the scenery """
+        # 4. The entity batch (culled to the view)
+        if self.entities is not None:
+            self.render_list.extend(self.entities.visible_blits(self.camera, self.render_scale), render.Z_ENTITIES)
+
+        # 5. Player and any other sprites in view, converted from world to screen coordinates
+        for sprite, screen_rect in self.all_sprites.visible(self.camera, alpha):
+            if self.render_scale == 1.0:
+                self.render_list.push(sprite.image, screen_rect.topleft, None, render.Z_SPRITES)
+            else:
+                scale = self.render_scale
+                self.render_list.push(self.scaled_image(sprite.image), (round(screen_rect.x * scale), round(screen_rect.y * scale)),
+                                      None, render.Z_SPRITES)
+        self.profiler.mark(profiler.SPRITES)
+
+    def solid_surface(self, size):
+        """ Opaque PLATFORM_COLOR surface of the given size, so level geometry can be queued as blits """
+        surface = self.solid_surfaces.get(size)
+        if surface is None:
+            surface = pygame.Surface(size).convert()
+            surface.fill(settings.PLATFORM_COLOR)
+            self.solid_surfaces[size] = surface
+        return surface
+
+    def set_render_scale(self, render_scale, loader=None):
+        """ Draw to surfaces at a different render_scale from now on (reloads the background layers) """
+        if render_scale == self.render_scale:
+            return
+        self.render_scale = render_scale
+        self.scaled_images = {}
+        self.bg_manager.set_render_scale(render_scale, loader)
+
+    def scaled_image(self, image):
+        """ Return image scaled by render_scale, scaling each distinct image only once """
+        scaled = self.scaled_images.get(image)
+        if scaled is None:
+            width, height = image.get_size()
+            size = (max(1, round(width * self.render_scale)), max(1, round(height * self.render_scale)))
+            scaled = pygame.transform.scale(image, size)
+            self.scaled_images[image] = scaled
+        return scaled
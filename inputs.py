@@ -0,0 +1,66 @@
+# inputs.py
+import pygame
+import settings # Import settings module
+
+# Player actions. Key events are turned into these, queued, and applied at the start of
+# the next simulation step, so the same action sequence always gives the same result.
+GO_LEFT = 1
+GO_RIGHT = 2
+JUMP = 3
+RELEASE_LEFT = 4 # Stop, if still moving left
+RELEASE_RIGHT = 5 # Stop, if still moving right
+
+
+def action_for_event(event):
+    """ Player action for a pygame event, or None """
+    if event.type == pygame.KEYDOWN:
+        if event.key == settings.KEY_LEFT:
+            return GO_LEFT
+        elif event.key == settings.KEY_RIGHT:
+            return GO_RIGHT
+        elif event.key == settings.KEY_JUMP:
+            return JUMP
+    elif event.type == pygame.KEYUP:
+        if event.key == settings.KEY_LEFT:
+            return RELEASE_LEFT
+        elif event.key == settings.KEY_RIGHT:
+            return RELEASE_RIGHT
+    return None
+
+
+def apply_action(player, action):
+    """ Call the Player method an action stands for """
+    if action == GO_LEFT:
+        player.go_left()
+    elif action == GO_RIGHT:
+        player.go_right()
+    elif action == JUMP:
+        player.jump()
+    elif action == RELEASE_LEFT:
+        # Stop horizontal movement only if the released key matches the current direction
+        if player.change_x < 0:
+            player.stop()
+    elif action == RELEASE_RIGHT:
+        if player.change_x > 0:
+            player.stop()
+
+
+class InputQueue:
+    def __init__(self):
+        """ Actions waiting for the next simulation step """
+        self.pending = []
+        self.recorder = None # Optional replay.InputRecorder, sees every applied action
+
+    def push(self, action):
+        """ Queue an action for the next step """
+        self.pending.append(action)
+
+    def apply(self, player, tick):
+        """ Apply queued actions in order at the start of simulation step tick """
+        if not self.pending:
+            return
+        for action in self.pending:
+            apply_action(player, action)
+            if self.recorder is not None:
+                self.recorder.record(tick, action)
+        self.pending.clear()
@@ -0,0 +1,221 @@
+# layers.py
+# Data-driven background layout: layers are described in a JSON manifest, resolved once into a
+# flat render plan, and the manifest and images can be watched for changes and hot reloaded.
+#
+# Manifest layout (settings.LAYER_MANIFEST_PATH), layers listed from furthest to nearest:
+#   {
+#     "source_size": [w, h],          default original image size for the layers below
+#     "layers": [
+#       {
+#         "path": "layer/sky.png",    relative to the manifest's folder
+#         "scale": "fit_height",      fit_height  = scale uniformly so source_size fills the screen height
+#                                     stretch_height = keep the source width, stretch to the screen height
+#                                     fixed       = scale to "size": [w, h]
+#         "anchor": "top",            top = "y" is from the top of the screen,
+#                                     ground = "y" is from VISIBLE_GROUND_Y
+#         "y": 0,
+#         "parallax": 0.0,            0.0 = fixed to the screen, 1.0 = moves with the camera
+#         "repeat": true,             wrap horizontally (false = drawn once)
+#         "fill_below_ground": false  repeat the part below the ground line down to the screen bottom
+#       }
+#     ]
+#   }
+#
+# Sizes and positions are in logical screen pixels. Without a manifest the fallback in default_specs() is used.
+import os
+import json
+import time
+import settings # Import settings module
+import assets # Import assets module
+
+SCALE_MODES = ('fit_height', 'stretch_height', 'fixed')
+ANCHORS = ('top', 'ground')
+
+
+def check_number(value, field, path):
+    """ Return value if it is a number, else raise ValueError naming the field """
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"'{field}' for {path} must be a number, got {value!r}")
+    return value
+
+
+def check_size(value, field, path):
+    """ Return value as a (width, height) tuple of positive numbers, else raise ValueError """
+    if not isinstance(value, (list, tuple)) or len(value) != 2:
+        raise ValueError(f"'{field}' for {path} must be [width, height], got {value!r}")
+    for number in value:
+        if check_number(number, field, path) <= 0:
+            raise ValueError(f"'{field}' for {path} must be positive, got {value!r}")
+    return tuple(value)
+
+
+def check_flag(value, field, path):
+    """ Return value if it is true or false, else raise ValueError """
+    if not isinstance(value, bool):
+        raise ValueError(f"'{field}' for {path} must be true or false, got {value!r}")
+    return value
+
+
+class LayerSpec:
+    def __init__(self, path, scale='fit_height', size=None, source_size=None, anchor='top', y=0,
+                 parallax=1.0, repeat=True, fill_below_ground=False):
+        """ One background layer as described in the manifest (raises ValueError for bad values) """
+        if scale not in SCALE_MODES:
+            raise ValueError(f"unknown scale mode {scale!r} for {path}")
+        if anchor not in ANCHORS:
+            raise ValueError(f"unknown anchor {anchor!r} for {path}")
+        if scale == 'fixed' and size is None:
+            raise ValueError(f"scale 'fixed' needs a size for {path}")
+
+        # Checked here, so a bad hand edit is reported instead of failing while the plan is built
+        self.path = path
+        self.scale = scale
+        self.size = check_size(size, 'size', path) if size is not None else None # Target size for 'fixed'
+        self.source_size = check_size(source_size, 'source_size', path) if source_size is not None \
+            else (settings.BACKGROUND_ORIGINAL_WIDTH, settings.BACKGROUND_ORIGINAL_HEIGHT)
+        self.anchor = anchor
+        self.y = check_number(y, 'y', path)
+        self.parallax = check_number(parallax, 'parallax', path)
+        self.repeat = check_flag(repeat, 'repeat', path)
+        self.fill_below_ground = check_flag(fill_below_ground, 'fill_below_ground', path)
+
+    def logical_size(self):
+        """ Size the layer is drawn at, in logical screen pixels """
+        if self.scale == 'fixed':
+            return tuple(self.size)
+        source_width, source_height = self.source_size
+        if self.scale == 'stretch_height':
+            return (source_width, settings.SCREEN_HEIGHT)
+        scale = settings.SCREEN_HEIGHT / source_height # fit_height
+        return (int(source_width * scale), int(source_height * scale))
+
+    def logical_y(self):
+        """ Y position of the layer's top edge, in logical screen pixels """
+        if self.anchor == 'ground':
+            return settings.VISIBLE_GROUND_Y + self.y
+        return self.y
+
+
+def default_specs():
+    """ Fallback layout, used only when the manifest is missing or cannot be read.
+
+    The manifest is what defines the layers; this mirrors the layers.json shipped with the game.
+    """
+    def layer_path(name):
+        return os.path.join(settings.LAYER_FOLDER, name)
+
+    return [
+        LayerSpec(layer_path('parallax-mountain-bg.png'), 'fit_height', y=0, parallax=0.0), # Sky
+        LayerSpec(layer_path('parallax-mountain-montain-far.png'), 'fit_height', y=50, parallax=0.1), # Far Mountains
+        LayerSpec(layer_path('parallax-mountain-mountains.png'), 'fit_height', y=150, parallax=0.3), # Closer Mountains
+        # Middle Trees: its ground line (570 px down the stretched image) lines up with VISIBLE_GROUND_Y
+        # and the ground below it is repeated
+        LayerSpec(layer_path('parallax-mountain-trees.png'), 'stretch_height', anchor='ground', y=-570,
+                  parallax=0.6, fill_below_ground=True),
+        LayerSpec(layer_path('parallax-mountain-foreground-trees.png'), 'stretch_height', anchor='ground', y=20,
+                  parallax=1.0), # Foreground, a little below the ground line
+    ]
+
+
+def parse_manifest(data, base_dir=''):
+    """ Build the list of LayerSpecs from decoded manifest JSON (raises ValueError if malformed) """
+    if not isinstance(data, dict) or not isinstance(data.get('layers'), list):
+        raise ValueError("manifest needs a 'layers' list")
+
+    default_source_size = data.get('source_size')
+    specs = []
+    for entry in data['layers']:
+        try:
+            path = os.path.join(base_dir, entry['path'])
+        except (TypeError, KeyError):
+            raise ValueError(f"layer without a path: {entry!r}")
+        specs.append(LayerSpec(
+            path,
+            scale=entry.get('scale', 'fit_height'),
+            size=entry.get('size'),
+            source_size=entry.get('source_size', default_source_size),
+            anchor=entry.get('anchor', 'top'),
+            y=entry.get('y', 0),
+            parallax=entry.get('parallax', 1.0),
+            repeat=entry.get('repeat', True),
+            fill_below_ground=entry.get('fill_below_ground', False),
+        ))
+    return specs
+
+
+def read_manifest(path):
+    """ Read the layer manifest (raises OSError or ValueError if it is missing or invalid) """
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_manifest(json.load(f), os.path.dirname(path)) # json.JSONDecodeError is a ValueError
+
+
+def load_manifest(path=None):
+    """ Read the layer manifest, falling back to the default layout if it is missing or invalid """
+    path = path or settings.LAYER_MANIFEST_PATH
+    if not path or not os.path.exists(path):
+        return default_specs()
+    try:
+        return read_manifest(path)
+    except (OSError, ValueError) as e:
+        print(f"Warning: could not read layer manifest {path}: {e}. Using the default layout.")
+        return default_specs()
+
+
+class PlannedLayer:
+    def __init__(self, spec, render_scale):
+        """ A layer with its layout resolved to framebuffer pixels for one render scale """
+        def scaled(value):
+            return round(value * render_scale)
+
+        width, height = spec.logical_size()
+        logical_y = spec.logical_y()
+
+        self.path = spec.path
+        self.size = (scaled(width), scaled(height)) # Size to load the image at
+        self.y = scaled(logical_y)
+        self.parallax = spec.parallax
+        self.scroll = spec.parallax * render_scale # Framebuffer pixels moved per logical camera pixel
+        self.repeat = spec.repeat
+
+        # Part of the image below the ground line, repeated in rows down to the bottom of the screen
+        self.fill_offset = None # Image row the repeated part starts at
+        self.fill_rows = [] # Y positions of the repeated rows
+        if spec.fill_below_ground:
+            fill_offset = scaled(settings.VISIBLE_GROUND_Y - logical_y)
+            fill_height = self.size[1] - fill_offset
+            if 0 <= fill_offset and fill_height > 0: # Nothing to repeat if the ground line is off the image
+                self.fill_offset = fill_offset
+                self.fill_rows = list(range(scaled(settings.VISIBLE_GROUND_Y), scaled(settings.SCREEN_HEIGHT), fill_height))
+
+
+def build_render_plan(specs, render_scale=1.0):
+    """ Resolve every layer's size, position and scroll speed once, in drawing order """
+    return [PlannedLayer(spec, render_scale) for spec in specs]
+
+
+class ManifestWatcher:
+    def __init__(self, manifest_path=None, interval=None):
+        """ Poll the layer manifest and layer images for changes, at most every interval seconds """
+        self.manifest_path = manifest_path or settings.LAYER_MANIFEST_PATH
+        self.interval = settings.LAYER_RELOAD_INTERVAL if interval is None else interval
+        self.stamps = {} # Path -> file stamp when last seen
+        self.next_check = 0.0
+
+    def watch(self, paths):
+        """ Watch the manifest and the given layer image paths, from their current state """
+        self.stamps = {path: assets.file_stamp(path) for path in [self.manifest_path, *paths]}
+
+    def poll(self):
+        """ Return the watched paths that changed since the last poll (empty most of the time) """
+        now = time.perf_counter()
+        if now < self.next_check:
+            return []
+        self.next_check = now + self.interval
+
+        changed = []
+        for path, stamp in self.stamps.items():
+            current = assets.file_stamp(path)
+            if current != stamp:
+                self.stamps[path] = current
+                changed.append(path)
+        return changed
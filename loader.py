@@ -0,0 +1,68 @@
+# loader.py
+import queue
+from concurrent.futures import ThreadPoolExecutor
+import pygame
+import settings # Import settings module
+import assets # Import assets module
+
+class AssetLoader:
+    def __init__(self, max_workers=None):
+        """ Initialize loader that decodes and scales images on a thread pool """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or settings.ASSET_LOADER_WORKERS)
+
+        # Finished jobs, pushed by worker threads and drained on the main thread by poll()
+        self.finished = queue.SimpleQueue()
+
+        self.total = 0 # Jobs submitted
+        self.completed = 0 # Jobs finished and delivered
+
+        # Optional callbacks, always called on the main thread from poll()
+        self.on_progress = None # on_progress(completed, total)
+        self.on_complete = None # on_complete()
+
+    def submit(self, path, size, on_loaded, alpha=True):
+        """ Queue an image to load at the given size (None = natural size); on_loaded(surface or None) runs on the main thread.
+
+        The image is converted with per-pixel alpha unless alpha is False.
+        """
+        self.total += 1
+        future = self.executor.submit(assets.load_unconverted, path, size)
+        future.add_done_callback(lambda f: self.finished.put((f, path, on_loaded, alpha)))
+
+    def poll(self):
+        """ Deliver finished images; call once per frame from the main thread """
+        delivered = False
+        while True:
+            try:
+                future, path, on_loaded, alpha = self.finished.get_nowait()
+            except queue.Empty:
+                break
+
+            try:
+                # Display-format conversion has to happen on the main thread
+                img = future.result()
+                img = img.convert_alpha() if alpha else img.convert()
+            except pygame.error as e:
+                print(f"Error loading image {path}: {e}")
+                img = None
+
+            self.completed += 1
+            delivered = True
+            on_loaded(img)
+            if self.on_progress is not None:
+                self.on_progress(self.completed, self.total)
+
+        if delivered and self.done() and self.on_complete is not None:
+            self.on_complete()
+
+    def progress(self):
+        """ Fraction of submitted images delivered so far (1.0 when nothing is pending) """
+        return self.completed / self.total if self.total else 1.0
+
+    def done(self):
+        """ True when every submitted image has been delivered """
+        return self.completed == self.total
+
+    def shutdown(self):
+        """ Stop the worker threads (pending jobs are finished first) """
+        self.executor.shutdown(wait=True)
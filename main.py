@@ -1,84 +1,320 @@
 # main.py
+import time
+STARTUP_START = time.perf_counter() # Taken before the other imports, which are part of the startup report
 import pygame
 import sys
 import settings # Import settings module
-import sprites # Import sprites module
-import background # Import background module
+import game # Import game module
+import dirty_renderer # Import dirty-rect renderer module
+import loader # Import asset loader module
+import framebuffer # Import scaled framebuffer module
+import profiler # Import profiler module
+import replay # Import input recording module
+import layers # Import layer manifest module
+import quality # Import adaptive quality module
+import texture_renderer # Import texture rendering backend module
+import snapshot # Import state snapshot module
+import capture # Import gameplay capture module
+import assets # Import assets module
+
+# Startup timing report (see settings.STARTUP_REPORT)
+startup = profiler.StartupTimer(STARTUP_START) if settings.STARTUP_REPORT else profiler.NullStartupTimer()
+startup.mark('import')
 
 # Initialize Pygame
-pygame.init()
+if settings.FAST_STARTUP:
+    # Video (which brings up the event queue) is all the game uses; the clock needs no init,
+    # and the profiler starts the font module itself when the overlay is first shown
+    pygame.display.init()
+else:
+    pygame.init()
+startup.mark('init')
+
+CAPTION = "Simple Side Scroller with Layers"
 
 # Set up the screen
-screen = pygame.display.set_mode((settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT))
-pygame.display.set_caption("Simple Side Scroller with Layers")
+textures = None
+if settings.RENDER_BACKEND == 'texture' and not texture_renderer.available():
+    print("Warning: pygame._sdl2 is not available, using the surface backend.")
+if settings.RENDER_BACKEND == 'texture' and texture_renderer.available():
+    # Images are still converted to a display format on load, which needs a mode set;
+    # a hidden one does, while the visible window is drawn by the texture renderer
+    screen = pygame.display.set_mode((1, 1), pygame.HIDDEN)
+    textures = texture_renderer.TextureRenderer(CAPTION, settings.RENDER_SCALE if settings.SCALED_FRAMEBUFFER else 1.0)
+    set_caption = textures.set_caption
+else:
+    display_flags = pygame.RESIZABLE if settings.RESIZABLE_WINDOW else 0
+    if settings.VSYNC:
+        # vsync is only honoured for SCALED/OPENGL windows
+        screen = pygame.display.set_mode((settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT), display_flags | pygame.SCALED, vsync=1)
+    else:
+        screen = pygame.display.set_mode((settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT), display_flags)
+    set_caption = pygame.display.set_caption
+set_caption(CAPTION)
+startup.mark('set_mode')
+
+def finish_loading():
+    """ Asset loader callback: every queued image has arrived """
+    set_caption(CAPTION)
+    startup.note("all assets loaded")
+
+# Asset loader: images decode on worker threads and appear as they finish
+asset_loader = None
+if settings.ASYNC_ASSET_LOADING:
+    asset_loader = loader.AssetLoader()
+    asset_loader.on_progress = lambda completed, total: set_caption(f"{CAPTION} - loading {completed}/{total}")
+    asset_loader.on_complete = finish_loading
+
+# Optional low-resolution framebuffer, scaled up to the window once per frame
+# (the texture backend scales while drawing instead)
+frame = None
+if settings.SCALED_FRAMEBUFFER and textures is None:
+    frame = framebuffer.ScaledFramebuffer(screen, settings.RENDER_SCALE)
+
+# Create game objects (background, player, sprites, camera)
+if textures is not None:
+    game_state = game.Game(asset_loader, textures.render_scale)
+else:
+    game_state = game.Game(asset_loader, frame.render_scale if frame is not None else 1.0)
+
+startup.mark('assets') # Queued, with an asset loader; the rest arrive over the next frames
+
+# Optional dirty-rect renderer: only changed regions are redrawn and presented
+renderer = None
+if settings.DIRTY_RECT_RENDERING and frame is None and textures is None:
+    renderer = dirty_renderer.DirtyRenderer(game_state, screen)
+
+# Adaptive quality: cheaper rendering while frames run over budget (see settings.QUALITY_LEVELS)
+base_render_scale = game_state.render_scale
+
+def apply_quality(level):
+    """ Switch rendering to one of settings.QUALITY_LEVELS """
+    global frame
+    quality_level = settings.QUALITY_LEVELS[level]
+    game_state.bg_manager.set_frozen_layers(quality_level['frozen_layers'])
+    game_state.bg_manager.set_ground_fill(quality_level['ground_fill'])
+
+    render_scale = base_render_scale * quality_level['render_scale']
+    if textures is not None:
+        textures.set_render_scale(render_scale)
+    elif render_scale == 1.0:
+        frame = None # Draw straight to the window again
+    elif frame is None or frame.render_scale != render_scale:
+        frame = framebuffer.ScaledFramebuffer(pygame.display.get_surface(), render_scale)
+    game_state.set_render_scale(render_scale) # Layers are reloaded at once, so no frame is drawn without them
+
+governor = None
+if settings.ADAPTIVE_QUALITY:
+    governor = quality.QualityGovernor(len(settings.QUALITY_LEVELS))
+    governor.on_change = apply_quality
 
-# Create game objects
-# Background Manager
-bg_manager = background.BackgroundManager()
-# Loading happens automatically in __init__
+# Optional hot reload of the background layer manifest and images
+layer_watcher = None
+if settings.LAYER_HOT_RELOAD:
+    layer_watcher = layers.ManifestWatcher(game_state.bg_manager.manifest_path)
+    layer_watcher.watch(game_state.bg_manager.layer_paths())
 
-# Player sprite
-player = sprites.Player()
+# Optional input recording for deterministic replays
+recorder = None
+if settings.INPUT_RECORD_PATH:
+    recorder = replay.InputRecorder(settings.INPUT_RECORD_PATH)
+    game_state.input.recorder = recorder
 
-# Create sprite group(s)
-all_sprites = pygame.sprite.Group()
-all_sprites.add(player)
+# Snapshots of the simulation state after every step, for rewinding (see settings.SNAPSHOTS_ENABLED)
+snapshots = None
+if settings.SNAPSHOTS_ENABLED:
+    snapshots = snapshot.SnapshotRing()
+    snapshots.capture(game_state) # The starting state, so the first steps can be rewound too
 
-# Set initial player position
-# Position the player's bottom on the visible ground level
-player.rect.x = settings.SCREEN_WIDTH // 4 # Start player near the left side
-player.rect.bottom = settings.VISIBLE_GROUND_Y # Align player bottom to ground
+def handle_state_key(key):
+    """ Rewind, save or load the simulation state for the snapshot keys """
+    if key == settings.KEY_SAVE_STATE:
+        try:
+            snapshot.save_state(settings.SAVE_STATE_PATH, game_state)
+            print(f"Saved state to {settings.SAVE_STATE_PATH}")
+        except OSError as e:
+            print(f"Warning: could not save state to {settings.SAVE_STATE_PATH}: {e}")
+        return
+    if recorder is not None:
+        # The recording would no longer replay to the same result
+        print("Warning: rewinding and loading states are disabled while recording input.")
+        return
+    if key == settings.KEY_REWIND:
+        try:
+            snapshots.rewind(game_state, round(settings.REWIND_SECONDS * settings.SIMULATION_HZ))
+        except ValueError as e:
+            print(f"Warning: could not rewind: {e}")
+    elif key == settings.KEY_LOAD_STATE:
+        try:
+            snapshot.load_state(settings.SAVE_STATE_PATH, game_state)
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not load state from {settings.SAVE_STATE_PATH}: {e}")
+            return
+        # Rewinding from here goes back within the loaded run, not the one before it
+        snapshots.clear()
+        snapshots.capture(game_state)
+
+# Optional gameplay capture: presented frames are written to CAPTURE_PATH by a background thread
+frame_capture = None
+if settings.CAPTURE_PATH:
+    if textures is not None:
+        print("Warning: gameplay capture needs the surface backend, not capturing.")
+    else:
+        frame_capture = capture.FrameCapture(settings.CAPTURE_PATH, screen)
+
+# Frame profiler: named timing scopes recorded into a ring buffer, with a toggleable overlay
+frame_profiler = profiler.FrameProfiler() if settings.PROFILER_ENABLED else profiler.NullProfiler()
+game_state.profiler = frame_profiler
 
 # Game clock
 clock = pygame.time.Clock()
 
+# Fixed-timestep state: real time is accumulated and consumed in SIM_DT steps
+SIM_DT = 1.0 / settings.SIMULATION_HZ
+accumulator = 0.0
+previous_time = time.perf_counter()
+
 # --- Main Game Loop ---
 running = True
 while running:
+    frame_profiler.begin_frame()
+
+    # --- Timing ---
+    current_time = time.perf_counter()
+    accumulator += current_time - previous_time
+    previous_time = current_time
+
+    # --- Asset Loading ---
+    # Bring in any images that finished loading since the last frame
+    if asset_loader is not None:
+        asset_loader.poll()
+
+    # Re-read the layer manifest and reload only the images that changed
+    if layer_watcher is not None and layer_watcher.poll():
+        reloaded = game_state.bg_manager.reload(asset_loader)
+        layer_watcher.watch(game_state.bg_manager.layer_paths())
+        print(f"Reloaded background layers ({reloaded} images)")
+
     # --- Event Handling ---
     for event in pygame.event.get():
         if event.type == settings.KEY_QUIT: # Check for window close button
             running = False
+        # The texture window is not the display module's (hidden) one, so closing it sends no QUIT
+        if event.type == pygame.WINDOWCLOSE and textures is not None:
+            running = False
+
+        # Toggle the profiler overlay
+        if event.type == pygame.KEYDOWN and event.key == settings.PROFILER_TOGGLE_KEY and settings.PROFILER_ENABLED:
+            frame_profiler.toggle()
+            if renderer is not None:
+                renderer.invalidate() # LayeredDirty never clears the area the overlay covered
+
+        # Rewind, save and load the simulation state
+        if event.type == pygame.KEYDOWN and snapshots is not None and event.key in (settings.KEY_REWIND, settings.KEY_SAVE_STATE, settings.KEY_LOAD_STATE):
+            handle_state_key(event.key)
+
+        # Window resized: re-fit the framebuffer to the new display surface
+        if event.type == pygame.VIDEORESIZE and frame is not None:
+            frame.resize(pygame.display.get_surface())
+
+        game_state.handle_event(event) # Player movement keys
 
-        # Check for key presses
-        if event.type == pygame.KEYDOWN:
-            if event.key == settings.KEY_LEFT:
-                player.go_left()
-            elif event.key == settings.KEY_RIGHT:
-                player.go_right()
-            elif event.key == settings.KEY_JUMP:
-                 player.jump()
-
-        # Check for key releases
-        if event.type == pygame.KEYUP:
-            # Stop horizontal movement if the released key matches the current direction
-            if event.key == settings.KEY_LEFT and player.change_x < 0:
-                 player.stop()
-            elif event.key == settings.KEY_RIGHT and player.change_x > 0:
-                 player.stop()
+    frame_profiler.mark(profiler.EVENTS)
 
     # --- Update Game State ---
-    # Call update method for all sprites in the group
-    all_sprites.update() # This updates player's position based on movement and gravity
+    # Hold the simulation until the player image is in: the player's rect, which is its
+    # collision box, takes the image's size, so steps taken with the placeholder would not
+    # replay the same way. Input pressed meanwhile is applied on the first step.
+    if game_state.player.image_pending:
+        accumulator = 0.0
 
-    # --- Drawing ---
-    # 1. Clear the screen
-    screen.fill(settings.BLACK)
+    # Run as many fixed simulation steps as the elapsed time calls for
+    steps = 0
+    while accumulator >= SIM_DT and steps < settings.MAX_CATCHUP_STEPS:
+        game_state.update() # One fixed simulation step
+        if snapshots is not None:
+            snapshots.capture(game_state)
+        accumulator -= SIM_DT
+        steps += 1
 
-    # 2. Draw background layers using the BackgroundManager
-    bg_manager.draw(screen)
+    # Too far behind (e.g. after a long stall): drop the backlog instead of spiralling
+    if accumulator >= SIM_DT:
+        accumulator %= SIM_DT
 
-    # 3. Draw player and any other sprites
-    all_sprites.draw(screen)
+    # How far we are between the last simulation step and the next one (0..1)
+    alpha = accumulator / SIM_DT
+    frame_profiler.mark(profiler.UPDATE)
 
-    # --- Update Display ---
-    # Display everything drawn to the screen
-    pygame.display.flip() # Or pygame.display.update()
+    # --- Drawing & Update Display ---
+    if renderer is not None and frame is None:
+        # Redraw and present only the rectangles that changed this frame
+        dirty_rects = renderer.draw(screen, alpha)
+        frame_profiler.mark(profiler.SPRITES)
+        if frame_profiler.visible:
+            frame_profiler.draw_overlay(screen)
+            dirty_rects.append(screen.get_rect())
+        frame_profiler.mark(profiler.OVERLAY)
+        work_time = time.perf_counter() - current_time
+        pygame.display.update(dirty_rects)
+    elif textures is not None:
+        # Compose the frame from uploaded textures; the renderer scales it to the window
+        game_state.draw(textures, alpha)
+        frame_profiler.mark(profiler.SPRITES)
+        if frame_profiler.visible:
+            textures.draw_overlay(frame_profiler.draw_overlay)
+        frame_profiler.mark(profiler.OVERLAY)
+        work_time = time.perf_counter() - current_time
+        textures.present()
+    elif frame is not None:
+        # Draw at low resolution, then scale up to the window in one pass
+        game_state.draw(frame.surface, alpha)
+        frame_profiler.mark(profiler.SPRITES)
+        frame.present()
+        frame_profiler.mark(profiler.PRESENT) # The upscale, added to the flip below
+        frame_profiler.draw_overlay(screen) # At window resolution, so it stays readable
+        frame_profiler.mark(profiler.OVERLAY)
+        work_time = time.perf_counter() - current_time
+        pygame.display.flip()
+    else:
+        game_state.draw(screen, alpha)
+        frame_profiler.mark(profiler.SPRITES)
+        frame_profiler.draw_overlay(screen)
+        frame_profiler.mark(profiler.OVERLAY)
+        work_time = time.perf_counter() - current_time
+        # Display everything drawn to the screen
+        pygame.display.flip()
+    if frame_capture is not None:
+        frame_capture.grab(pygame.display.get_surface()) # The window surface, which may have been resized
+    frame_profiler.mark(profiler.PRESENT)
+    if not startup.done:
+        startup.mark('first flip')
+        startup.report()
 
     # --- Control Frame Rate ---
-    # Limit the game to the specified FPS
-    clock.tick(settings.FPS)
+    # Limit rendering to RENDER_FPS (0 = uncapped); simulation speed is unaffected
+    clock.tick(settings.RENDER_FPS)
+    if governor is not None:
+        # Time spent producing the frame, up to presenting it: waiting for vsync in flip()
+        # or for the frame cap is not work, and would read as a full frame budget every frame
+        governor.record(work_time * 1000)
+    frame_profiler.mark(profiler.TICK)
+    frame_profiler.end_frame()
 
 # --- Game End ---
+if recorder is not None:
+    recorder.close(game_state)
+if frame_capture is not None:
+    frame_capture.close()
+if settings.PROFILER_ENABLED:
+    frame_profiler.close()
+    if settings.PROFILER_DUMP_PATH:
+        frame_profiler.dump(settings.PROFILER_DUMP_PATH)
+game_state.close()
+if asset_loader is not None:
+    asset_loader.shutdown()
+if textures is not None:
+    textures.close()
+if settings.ASSET_CACHE_ENABLED:
+    assets.prune_cache()
 pygame.quit()
 sys.exit()
\ No newline at end of file
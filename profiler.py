@@ -0,0 +1,214 @@
+# profiler.py
+import gc
+import json
+import time
+from array import array
+import pygame
+import settings # Import settings module
+
+# Timing scopes, in the order the main loop passes through them
+SCOPES = ('events', 'update', 'fill', 'background', 'level', 'sprites', 'overlay', 'present', 'tick')
+EVENTS, UPDATE, FILL, BACKGROUND, LEVEL, SPRITES, OVERLAY, PRESENT, TICK = range(len(SCOPES))
+
+
+class NullProfiler:
+    """ Stand-in used when profiling is off; every hook does nothing """
+    enabled = False
+    visible = False
+
+    def begin_frame(self):
+        pass
+
+    def mark(self, scope):
+        pass
+
+    def end_frame(self):
+        pass
+
+    def draw_overlay(self, surface):
+        pass
+
+
+class FrameProfiler:
+    enabled = True # Scopes are recorded, so callers may split work to time it separately
+
+    def __init__(self, capacity=None):
+        """ Per-frame scope timings kept in a fixed-size ring buffer of the last capacity frames """
+        self.capacity = capacity or settings.PROFILER_HISTORY
+        self.num_scopes = len(SCOPES)
+
+        # Ring buffers, allocated once: recording a frame only writes into them (milliseconds)
+        self.samples = array('d', [0.0]) * (self.capacity * self.num_scopes) # [frame][scope]
+        self.frame_ms = array('d', [0.0]) * self.capacity # Whole frame
+        self.gc_ms = array('d', [0.0]) * self.capacity # Time spent in garbage collection
+
+        self.frames = 0 # Frames recorded in total
+        self.slot = 0 # Ring position of the frame being recorded
+        self.frame_start = 0.0
+        self.last_mark = 0.0
+        self.gc_start = 0.0
+
+        self.visible = False # On-screen overlay toggle
+        self.font = None # Created on first overlay draw
+
+        # Time garbage collection pauses, so they can be told apart from draw stalls
+        gc.callbacks.append(self.on_gc)
+
+    def on_gc(self, phase, info):
+        """ gc callback: add collection time to the current frame """
+        if phase == 'start':
+            self.gc_start = time.perf_counter()
+        else:
+            self.gc_ms[self.slot] += (time.perf_counter() - self.gc_start) * 1000
+
+    def begin_frame(self):
+        """ Start recording a frame """
+        base = self.slot * self.num_scopes
+        for scope in range(self.num_scopes):
+            self.samples[base + scope] = 0.0
+        self.gc_ms[self.slot] = 0.0
+        self.frame_start = self.last_mark = time.perf_counter()
+
+    def mark(self, scope):
+        """ Charge the time since the previous mark to scope """
+        now = time.perf_counter()
+        self.samples[self.slot * self.num_scopes + scope] += (now - self.last_mark) * 1000
+        self.last_mark = now
+
+    def end_frame(self):
+        """ Finish the frame and advance the ring buffer """
+        self.frame_ms[self.slot] = (time.perf_counter() - self.frame_start) * 1000
+        self.frames += 1
+        self.slot = (self.slot + 1) % self.capacity
+
+    def recorded_slots(self):
+        """ Ring slots of the recorded frames, oldest first """
+        count = min(self.frames, self.capacity)
+        first = (self.slot - count) % self.capacity
+        return [(first + i) % self.capacity for i in range(count)]
+
+    def percentile(self, values, fraction):
+        """ Nearest-rank percentile of a sorted list """
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(fraction * len(values)))]
+
+    def summary(self):
+        """ Frame time percentiles and mean time per scope over the recorded frames """
+        slots = self.recorded_slots()
+        frame_times = sorted(self.frame_ms[slot] for slot in slots)
+        count = len(slots) or 1
+        return {
+            'frames': len(slots),
+            'p50_ms': self.percentile(frame_times, 0.50),
+            'p95_ms': self.percentile(frame_times, 0.95),
+            'p99_ms': self.percentile(frame_times, 0.99),
+            'max_ms': frame_times[-1] if frame_times else 0.0,
+            'gc_ms': sum(self.gc_ms[slot] for slot in slots) / count,
+            'scopes_ms': {name: sum(self.samples[slot * self.num_scopes + scope] for slot in slots) / count
+                          for scope, name in enumerate(SCOPES)},
+        }
+
+    def toggle(self):
+        """ Show or hide the on-screen overlay """
+        self.visible = not self.visible
+
+    def draw_overlay(self, surface):
+        """ Draw the frame time graph and statistics in the top-left corner """
+        if not self.visible:
+            return
+        if self.font is None:
+            pygame.font.init()
+            self.font = pygame.font.Font(None, 18)
+
+        graph_width, graph_height = 240, 60
+        panel = pygame.Rect(4, 4, graph_width + 8, graph_height + 8 + 16 * 4)
+        surface.fill((0, 0, 0), panel)
+
+        # Frame time graph, newest on the right; the line marks the target frame time
+        target_ms = 1000 / settings.FPS
+        ms_per_pixel = target_ms * 2 / graph_height # Graph spans up to twice the target
+        slots = self.recorded_slots()[-graph_width:]
+        bottom = panel.y + 4 + graph_height
+        for x, slot in enumerate(slots):
+            bar = min(graph_height, int(self.frame_ms[slot] / ms_per_pixel))
+            colour = (80, 220, 80) if self.frame_ms[slot] <= target_ms else (230, 70, 70)
+            left = panel.x + 4 + graph_width - len(slots) + x
+            pygame.draw.line(surface, colour, (left, bottom), (left, bottom - bar))
+        target_y = bottom - int(target_ms / ms_per_pixel)
+        pygame.draw.line(surface, (200, 200, 200), (panel.x + 4, target_y), (panel.x + 4 + graph_width, target_y))
+
+        stats = self.summary()
+        scopes = stats['scopes_ms']
+        lines = [
+            f"p50 {stats['p50_ms']:.2f}  p95 {stats['p95_ms']:.2f}  p99 {stats['p99_ms']:.2f}  max {stats['max_ms']:.2f} ms",
+            f"events {scopes['events']:.2f}  update {scopes['update']:.2f}  gc {stats['gc_ms']:.2f}",
+            f"fill {scopes['fill']:.2f}  bg {scopes['background']:.2f}  level {scopes['level']:.2f}  sprites {scopes['sprites']:.2f}",
+            f"overlay {scopes['overlay']:.2f}  present {scopes['present']:.2f}  tick {scopes['tick']:.2f}",
+        ]
+        for i, line in enumerate(lines):
+            surface.blit(self.font.render(line, True, settings.WHITE), (panel.x + 4, bottom + 4 + i * 16))
+
+    def dump(self, path):
+        """ Write the recorded frames to path as CSV, or JSON if path ends in .json """
+        slots = self.recorded_slots()
+        rows = [[self.frame_ms[slot]] + [self.samples[slot * self.num_scopes + scope] for scope in range(self.num_scopes)]
+                + [self.gc_ms[slot]] for slot in slots]
+        columns = ['frame_ms'] + list(SCOPES) + ['gc_ms']
+
+        with open(path, 'w', newline='') as f:
+            if path.endswith('.json'):
+                json.dump({'columns': columns, 'frames': rows, 'summary': self.summary()}, f)
+            else:
+                f.write(','.join(columns) + '\n')
+                for row in rows:
+                    f.write(','.join(f"{value:.4f}" for value in row) + '\n')
+
+    def close(self):
+        """ Stop timing garbage collection """
+        if self.on_gc in gc.callbacks:
+            gc.callbacks.remove(self.on_gc)
+
+
+class NullStartupTimer:
+    """ Stand-in used when the startup report is off """
+    done = True
+
+    def mark(self, phase):
+        pass
+
+    def note(self, event):
+        pass
+
+    def report(self, budget_ms=None):
+        pass
+
+
+class StartupTimer:
+    def __init__(self, start):
+        """ Time the phases of startup from start, a time.perf_counter() taken before the imports """
+        self.start = start
+        self.last_mark = start
+        self.phases = [] # (phase name, milliseconds) in the order they were marked
+        self.done = False # Report printed
+
+    def mark(self, phase):
+        """ Charge the time since the previous mark to phase """
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self.last_mark) * 1000))
+        self.last_mark = now
+
+    def note(self, event):
+        """ Print when something that finishes after the first frame (e.g. background loading) happened """
+        print(f"Startup: {event} after {(time.perf_counter() - self.start) * 1000:.1f} ms")
+
+    def report(self, budget_ms=None):
+        """ Print how long each phase took, and whether the first frame came within budget_ms """
+        self.done = True
+        total_ms = (self.last_mark - self.start) * 1000
+        print(f"Startup: first frame after {total_ms:.1f} ms")
+        for phase, ms in self.phases:
+            print(f"  {phase:<10} {ms:8.1f} ms")
+        budget_ms = budget_ms or settings.STARTUP_BUDGET_MS
+        if total_ms > budget_ms:
+            print(f"Warning: startup took {total_ms:.1f} ms, over the {budget_ms} ms budget.")
@@ -0,0 +1,64 @@
+# quality.py
+# Adaptive quality: watches how long frames take to produce and steps the rendering quality
+# down when they run over budget, and back up once there is plenty of headroom again.
+# The levels themselves are listed in settings.QUALITY_LEVELS; main.py applies them.
+from array import array
+import settings # Import settings module
+
+
+class QualityGovernor:
+    def __init__(self, num_levels, target_ms=None, window=None):
+        """ Choose a quality level (0 = best, num_levels - 1 = cheapest) from measured frame times.
+
+        Frame times are judged a window of frames at a time by their QUALITY_PERCENTILE.
+        Quality drops after one slow window but only rises after QUALITY_UPGRADE_WINDOWS fast
+        ones in a row, and the window after a change is ignored, so it does not oscillate.
+        """
+        self.num_levels = num_levels
+        self.level = 0
+        self.target_ms = target_ms or 1000 / settings.FPS
+        self.window = window or settings.QUALITY_WINDOW
+
+        # Frame times of the current window, allocated once (milliseconds)
+        self.samples = array('d', [0.0]) * self.window
+        self.count = 0
+
+        self.fast_windows = 0 # Consecutive windows well under budget
+        self.settling = False # Skip the window right after a change (reloads, cache rebuilds)
+
+        # Called with the new level whenever it changes
+        self.on_change = None # on_change(level)
+
+    def record(self, frame_ms):
+        """ Add the time the last frame took to produce (without any frame cap delay) """
+        self.samples[self.count] = frame_ms
+        self.count += 1
+        if self.count < self.window:
+            return
+        self.count = 0
+
+        if self.settling:
+            self.settling = False
+            return
+
+        ordered = sorted(self.samples)
+        busy_ms = ordered[min(self.window - 1, int(settings.QUALITY_PERCENTILE * self.window))]
+
+        if busy_ms > self.target_ms * settings.QUALITY_DOWNGRADE_RATIO:
+            self.fast_windows = 0
+            if self.level < self.num_levels - 1:
+                self.set_level(self.level + 1)
+        elif busy_ms < self.target_ms * settings.QUALITY_UPGRADE_RATIO:
+            self.fast_windows += 1
+            if self.fast_windows >= settings.QUALITY_UPGRADE_WINDOWS and self.level > 0:
+                self.fast_windows = 0
+                self.set_level(self.level - 1)
+        else:
+            self.fast_windows = 0 # In between: hold the current level
+
+    def set_level(self, level):
+        """ Switch to a level and tell on_change """
+        self.level = level
+        self.settling = True
+        if self.on_change is not None:
+            self.on_change(level)
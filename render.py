@@ -0,0 +1,96 @@
+# render.py
+# Per-frame render list: the background, level, entities and sprites push blit commands
+# (surface, dest, area, z) instead of blitting immediately. The list is put in z order once
+# and handed to the target in a single Surface.blits() call, or one call per z range when
+# each subsystem's blits are timed separately (see Game.submit).
+import bisect
+import itertools
+
+# Draw order of the subsystems (lower z is drawn first, equal z in the order pushed)
+Z_BACKGROUND = 0 # Plus the layer index
+Z_LEVEL = 100
+Z_ENTITIES = 200
+Z_SPRITES = 300
+
+
+class RenderList:
+    def __init__(self, capacity=256):
+        """ Reusable list of blit commands, with room for capacity commands before it has to grow """
+        # Slots are allocated once and overwritten every frame
+        self.commands = [None] * capacity # (surface, dest[, area]) as Surface.blits() takes them
+        self.depths = [0] * capacity # z of each command
+        self.count = 0
+        self.start = 0 # First command not submitted yet
+        self.in_order = True # Still sorted by z (the usual case, since subsystems push back to front)
+
+        # Per-frame stats
+        self.submitted = 0 # Commands in the last submit
+        self.peak = 0 # Most commands in one frame so far
+
+    def clear(self):
+        """ Start a new frame """
+        self.count = 0
+        self.start = 0
+        self.in_order = True
+
+    def reserve(self, extra):
+        """ Make sure extra more commands fit in the slots """
+        needed = self.count + extra
+        if needed > len(self.commands):
+            # At least double; this only happens until the busiest frame has been seen
+            grow = max(needed, 2 * len(self.commands)) - len(self.commands)
+            self.commands.extend([None] * grow)
+            self.depths.extend([0] * grow)
+
+    def push(self, surface, dest, area=None, z=0):
+        """ Queue a blit of surface (or its area) at dest """
+        index = self.count
+        if index == len(self.commands):
+            self.reserve(1)
+        if index and z < self.depths[index - 1]:
+            self.in_order = False
+        self.commands[index] = (surface, dest, area)
+        self.depths[index] = z
+        self.count = index + 1
+
+    def extend(self, blits, z=0):
+        """ Queue a list of (surface, dest) pairs at the same z """
+        n = len(blits)
+        if n == 0:
+            return
+        self.reserve(n)
+        start = self.count
+        if start and z < self.depths[start - 1]:
+            self.in_order = False
+        # Surface.blits() takes the pairs as they are, so they are stored without repacking
+        self.commands[start:start + n] = blits
+        self.depths[start:start + n] = [z] * n
+        self.count = start + n
+
+    def sort(self):
+        """ Put the queued commands in z order """
+        count = self.count
+        # Stable sort, so commands with equal z keep the order they were pushed in
+        order = sorted(range(count), key=self.depths.__getitem__)
+        self.commands[:count] = [self.commands[i] for i in order]
+        self.depths[:count] = [self.depths[i] for i in order]
+        self.in_order = True
+
+    def submit(self, target, z_end=None):
+        """ Blit the queued commands onto target in z order with one Surface.blits() call.
+
+        With z_end, only the commands below z_end not yet submitted are blitted, so a frame can be
+        submitted a z range at a time; everything must be queued before the first range.
+        Without it, the rest are blitted and the list is cleared for the next frame.
+        """
+        if not self.in_order:
+            self.sort()
+        end = self.count if z_end is None else bisect.bisect_left(self.depths, z_end, self.start, self.count)
+        if end > self.start:
+            target.blits(itertools.islice(self.commands, self.start, end), doreturn=False)
+        self.start = end
+
+        if z_end is None:
+            self.submitted = self.count
+            self.peak = max(self.peak, self.count)
+            self.clear()
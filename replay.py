@@ -0,0 +1,151 @@
+# replay.py
+# Input recording and deterministic replay.
+#
+# A recording is the list of (simulation step, action) pairs the player performed plus
+# checksums of the final player state and of the state after every step. Replaying it headless
+# and uncapped must reproduce both exactly, which catches physics changes that silently alter
+# behaviour, even if the player happens to end up in the same place.
+#
+# Record by setting INPUT_RECORD_PATH in settings.py and playing; replay with:
+#   python replay.py session.gxin [--draw]
+#
+# File layout (little-endian):
+#   header  : magic b'GXIN', version, simulation rate (Hz), number of records
+#   records : (step uint32, action uint8) in the order applied
+#   footer  : total steps uint32, final state checksum uint32, per-step trajectory checksum uint32
+import os
+import sys
+import time
+import zlib
+import struct
+import argparse
+import pygame
+import settings # Import settings module
+import game # Import game module
+
+LOG_HEADER = struct.Struct('<4sHHI')
+LOG_RECORD = struct.Struct('<IB')
+LOG_FOOTER = struct.Struct('<III')
+LOG_MAGIC = b'GXIN'
+LOG_VERSION = 1
+
+PLAYER_STATE = struct.Struct('<iiddB')
+
+
+def state_checksum(game_state, crc=0):
+    """ CRC32 of the player's simulation state, optionally continuing a running crc """
+    player = game_state.player
+    packed = PLAYER_STATE.pack(player.rect.x, player.rect.y, player.change_x, player.change_y, player.on_ground)
+    return zlib.crc32(packed, crc)
+
+
+class InputRecorder:
+    def __init__(self, path):
+        """ Collect applied actions in memory; written to path by close() """
+        self.path = path
+        self.records = bytearray()
+        self.count = 0
+        self.trajectory = 0 # Running checksum of the state after every step
+
+    def record(self, tick, action):
+        """ Remember that action was applied at simulation step tick """
+        self.records += LOG_RECORD.pack(tick, action)
+        self.count += 1
+
+    def observe(self, game_state):
+        """ Fold the state after a simulation step into the trajectory checksum """
+        self.trajectory = state_checksum(game_state, self.trajectory)
+
+    def close(self, game_state):
+        """ Write the log, ending with the step count and final state checksum """
+        with open(self.path, 'wb') as f:
+            f.write(LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION, settings.SIMULATION_HZ, self.count))
+            f.write(self.records)
+            f.write(LOG_FOOTER.pack(game_state.tick, state_checksum(game_state), self.trajectory))
+
+
+def load_log(path):
+    """ Read a recording: returns (rate in Hz, [(step, action)], total steps, final checksum, trajectory checksum) """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < LOG_HEADER.size:
+        raise ValueError(f"{path} is not an input recording")
+    magic, version, simulation_hz, count = LOG_HEADER.unpack_from(data)
+    if magic != LOG_MAGIC or version != LOG_VERSION:
+        raise ValueError(f"{path} is not an input recording")
+    records_end = LOG_HEADER.size + count * LOG_RECORD.size
+    if len(data) < records_end + LOG_FOOTER.size:
+        raise ValueError(f"{path} is cut short ({len(data)} of {records_end + LOG_FOOTER.size} bytes)")
+    records = list(LOG_RECORD.iter_unpack(data[LOG_HEADER.size:records_end]))
+    total_ticks, checksum, trajectory = LOG_FOOTER.unpack_from(data, records_end)
+    return simulation_hz, records, total_ticks, checksum, trajectory
+
+
+def replay(path, draw=False):
+    """ Replay a recording with no frame cap; returns (checksums matched, results) """
+
+    simulation_hz, records, total_ticks, expected, expected_trajectory = load_log(path)
+    if simulation_hz != settings.SIMULATION_HZ:
+        print(f"Warning: recorded at {simulation_hz} Hz, replaying at {settings.SIMULATION_HZ} Hz")
+
+    pygame.display.init()
+    screen = pygame.display.set_mode((settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT))
+    game_state = game.Game()
+
+    next_record = 0
+    trajectory = 0
+    start = time.perf_counter()
+    for tick in range(total_ticks):
+        # Queue this step's actions exactly as the input layer did while recording
+        while next_record < len(records) and records[next_record][0] == tick:
+            game_state.input.push(records[next_record][1])
+            next_record += 1
+        game_state.update()
+        trajectory = state_checksum(game_state, trajectory)
+        if draw:
+            game_state.draw(screen)
+            pygame.display.flip()
+    elapsed = time.perf_counter() - start
+
+    actual = state_checksum(game_state)
+    results = {
+        'ticks': total_ticks,
+        'actions': len(records),
+        'seconds': elapsed,
+        'ticks_per_second': total_ticks / elapsed if elapsed > 0 else 0.0,
+        'expected_checksum': expected,
+        'actual_checksum': actual,
+        'expected_trajectory': expected_trajectory,
+        'actual_trajectory': trajectory,
+    }
+    pygame.quit()
+    return actual == expected and trajectory == expected_trajectory, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay an input recording and verify the final state")
+    parser.add_argument('path', help="recording written with INPUT_RECORD_PATH")
+    parser.add_argument('--draw', action='store_true', help="draw every step as well (for render benchmarks)")
+    args = parser.parse_args()
+
+    # Run headless; must be set before pygame creates a display
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+    try:
+        matched, results = replay(args.path, args.draw)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    print(f"{results['ticks']} steps, {results['actions']} actions in {results['seconds']:.3f} s "
+          f"({results['ticks_per_second']:.0f} steps/s)")
+    if matched:
+        print(f"OK: final state {results['actual_checksum']:08x}, trajectory {results['actual_trajectory']:08x}")
+    else:
+        print(f"MISMATCH: final state expected {results['expected_checksum']:08x}, got {results['actual_checksum']:08x}; "
+              f"trajectory expected {results['expected_trajectory']:08x}, got {results['actual_trajectory']:08x}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
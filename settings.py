@@ -1,5 +1,4 @@
 # settings.py
-import os
 import pygame
 
 # Screen dimensions
@@ -14,55 +13,195 @@ BLUE = (0, 0, 255)
 
 # Background original size
 BACKGROUND_ORIGINAL_WIDTH = 272
-BACKGROUND_ORIGINAL_HEIGHT = 160
-
-# Scale factor based on height to ensure height matches SCREEN_HEIGHT
-scale_factor_y = SCREEN_HEIGHT / BACKGROUND_ORIGINAL_HEIGHT # 600 / 160 = 3.75
-
-# Target scaled dimensions for most layers (width fills/exceeds SCREEN_WIDTH, height matches SCREEN_HEIGHT)
-BACKGROUND_SCALED_WIDTH = int(BACKGROUND_ORIGINAL_WIDTH * scale_factor_y) # 272 * 3.75 = 1020
-BACKGROUND_SCALED_HEIGHT = int(BACKGROUND_ORIGINAL_HEIGHT * scale_factor_y) # 160 * 3.75 = 600
-
-# Target scaled dimensions for Layers 3 and 4 (keep original width, scale height to SCREEN_HEIGHT)
-TILED_LAYER_SCALED_WIDTH = BACKGROUND_ORIGINAL_WIDTH # 272
-TILED_LAYER_SCALED_HEIGHT = SCREEN_HEIGHT # 600
-
+BACKGROUND_ORIGINAL_HEIGHT = 160 # Layer sizes are scaled from this by layers.py (see layers.json)
 
 # File paths
 LAYER_FOLDER = 'layer'
-PLAYER_IMAGE_PATH = 'girl_sprite.png'
-
-# Background layer paths in drawing order (furthest to nearest)
-BACKGROUND_LAYER_PATHS = [
-    os.path.join(LAYER_FOLDER, 'parallax-mountain-bg.png'),             # Layer 0: Sky
-    os.path.join(LAYER_FOLDER, 'parallax-mountain-montain-far.png'), # Layer 1: Far Mountains
-    os.path.join(LAYER_FOLDER, 'parallax-mountain-mountains.png'),    # Layer 2: Closer Mountains
-    os.path.join(LAYER_FOLDER, 'parallax-mountain-trees.png'),        # Layer 3: Middle Trees (User identified as ground, will be tiled)
-    os.path.join(LAYER_FOLDER, 'parallax-mountain-foreground-trees.png') # Layer 4: Foreground (Will be tiled)
-]
+PLAYER_IMAGE_PATH = 'girl_sprite.PNG' # Case must match the file on case-sensitive filesystems
+
+# Player sprite sheet: the atlas is a grid of equally sized frames, numbered left to right, top to bottom
+PLAYER_SHEET_COLUMNS = 1
+PLAYER_SHEET_ROWS = 1
+PLAYER_SHEET_FACES_RIGHT = True # Direction the frames are drawn facing
+# Animation state -> (frame indices, simulation steps per frame)
+PLAYER_ANIMATIONS = {
+    'idle': ([0], 10),
+    'run': ([0], 6),
+    'jump': ([0], 1),
+    'fall': ([0], 1),
+}
+
+# On-disk cache of decoded, pre-scaled image pixels (see assets.py)
+ASSET_CACHE_ENABLED = True
+ASSET_CACHE_DIR = '.asset_cache'
+# Size the cache is pruned back to on exit, least recently used files first (one set of files
+# per image per render scale, so the quality governor adds several)
+ASSET_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+# Decode and scale images on a thread pool so the first frame is shown immediately
+# and layers appear as they finish loading (see loader.py)
+ASYNC_ASSET_LOADING = True
+ASSET_LOADER_WORKERS = 4
+
+# Loaded images are shared through a reference-counted pool (see assets.SurfacePool). Images no
+# longer in use stay resident for quick reuse until the pool holds more than this many bytes.
+SURFACE_POOL_BUDGET = 32 * 1024 * 1024
+
+# Background layers, their scaling, position and parallax are read from this JSON manifest
+# (see layers.py); without it the fallback layout in layers.default_specs() is used
+LAYER_MANIFEST_PATH = 'layers.json'
+# Watch the manifest and layer images and reload whatever changed while the game runs
+LAYER_HOT_RELOAD = False
+LAYER_RELOAD_INTERVAL = 0.5 # Seconds between checks
 
 # Game mechanics constants
 FPS = 60
+
+# --- Timing ---
+# Physics runs at a fixed rate, independent of how fast frames are rendered.
+# GRAVITY, PLAYER_SPEED and PLAYER_JUMP_POWER are per simulation step.
+SIMULATION_HZ = 60
+MAX_CATCHUP_STEPS = 5 # Most simulation steps run per rendered frame before dropping time
+RENDER_FPS = FPS # Render frame cap; 0 = uncapped
+VSYNC = False # Present in sync with the display refresh (uses a SCALED window)
+
 GRAVITY = .35
 PLAYER_SPEED = 5
 PLAYER_JUMP_POWER = 10
 
+# --- Level Geometry ---
+# Solid rects (x, y, width, height) in world coordinates: platforms, walls and tiles.
+# They are indexed in a collision.SpatialGrid with cells of COLLISION_CELL_SIZE pixels.
+COLLISION_CELL_SIZE = 128
+PLATFORM_COLOR = (60, 40, 50)
+# Laid out for the 97x122 player sprite, which jumps about 140 px: the wall can be jumped onto
+# from the ground, each platform from the step before it, and the player walks under both.
+LEVEL_SOLIDS = [
+    (1100, 470, 40, 80),   # Short wall standing on the ground
+    (1200, 380, 160, 16),  # Low platform, reached from the top of the wall
+    (1440, 280, 160, 16),  # Higher platform, reached from the low platform
+]
+
+# --- Streaming World ---
+# Tile/entity data in fixed-width chunk files under WORLD_DIR (see world.py), loaded
+# CHUNK_LOAD_AHEAD chunks ahead of the player and evicted behind to stay under WORLD_MEMORY_BUDGET bytes.
+STREAMING_WORLD = True
+WORLD_DIR = 'world'
+TILE_SIZE = 32
+CHUNK_WIDTH_TILES = 32 # 1024 px per chunk
+CHUNK_HEIGHT_TILES = 19 # Covers SCREEN_HEIGHT
+CHUNK_LOAD_AHEAD = 2
+WORLD_MEMORY_BUDGET = 16 * 1024
+
+# --- Entities ---
+# Number of demo enemies/pickups scattered around the start (see entities.py, needs NumPy)
+DEMO_ENTITY_COUNT = 0
+
 # --- Crucial Constant for Ground Alignment ---
 # This is the Y coordinate on the screen where the player visually stands
 # and where the ground in the main ground layer (Layer 3) should align.
 VISIBLE_GROUND_Y = SCREEN_HEIGHT - 50 # Example value: 600 - 50 = 550
 
-# --- Background Positioning Constants ---
-# These define the Y offset from the TOP of the screen for layers 0-2 and 4.
-BG_Y = 0 # Layer 0 Y
-FAR_MOUNTAIN_Y = 50 # Layer 1 Example Y
-MOUNTAINS_Y = 150 # Layer 2 Example Y
-
-# Offset from the TOP of the SCALED Layer 3 (Middle Trees) image (scaled to 272x600) to its ground line.
-MIDDLE_TREES_GROUND_Y_OFFSET_SCALED = 570 # Example value (from previous turn)
-
-# Y position for Layer 4 (Foreground) - Position it visually below the main ground layer (Layer 3)
-FOREGROUND_Y = VISIBLE_GROUND_Y + 20 # Example: 20 pixels below the visible ground line (550 + 20 = 570)
+# --- Background Rendering ---
+# Flatten the static background layers once into a single opaque surface and
+# blit that each frame, instead of alpha-blending every layer every frame.
+BACKGROUND_CACHE_ENABLED = True
+
+# Draw only the regions that changed and present them with display.update(rects)
+# instead of redrawing and flipping the whole screen every frame (see dirty_renderer.py).
+# Pays off when the camera is still; a moving camera still repaints the full screen.
+DIRTY_RECT_RENDERING = False
+
+# --- Internal Resolution ---
+# Draw into an offscreen framebuffer at RENDER_SCALE of the logical SCREEN_WIDTH x SCREEN_HEIGHT
+# and scale it up to the window once per frame (see framebuffer.py). Game logic stays in
+# logical pixels. NATIVE_RENDER_SCALE draws the layers at the art's own 160 px height,
+# with no upscaling at load time. DIRTY_RECT_RENDERING is not used in this mode.
+NATIVE_RENDER_SCALE = BACKGROUND_ORIGINAL_HEIGHT / SCREEN_HEIGHT # 160 / 600
+SCALED_FRAMEBUFFER = False
+RENDER_SCALE = NATIVE_RENDER_SCALE
+RESIZABLE_WINDOW = False
+
+# --- Render Backend ---
+# 'surface' = software blits onto the display surface (the modes above)
+# 'texture' = layers and sprites are uploaded once as SDL textures and frames are drawn with
+#             Renderer copies, scaled to the window while drawing (see texture_renderer.py).
+#             Uses the GPU where SDL has an accelerated renderer and SDL's software renderer
+#             otherwise; needs pygame._sdl2 and falls back to 'surface' without it.
+#             SCALED_FRAMEBUFFER picks the internal resolution; DIRTY_RECT_RENDERING is not used.
+# Chosen once at startup.
+RENDER_BACKEND = 'surface'
+
+# --- Adaptive Quality ---
+# Step rendering quality down when frames take longer than 1000 / FPS ms to produce, and back up
+# when there is headroom again (see quality.py). Levels go from best to cheapest:
+#   frozen_layers - leading background layers baked into the static cache (they stop scrolling)
+#   ground_fill   - draw the repeated ground below the ground line
+#   render_scale  - internal resolution, relative to RENDER_SCALE (or to full size without SCALED_FRAMEBUFFER)
+ADAPTIVE_QUALITY = True
+QUALITY_LEVELS = [
+    {'frozen_layers': 0, 'ground_fill': True, 'render_scale': 1.0},
+    {'frozen_layers': 3, 'ground_fill': True, 'render_scale': 1.0},
+    {'frozen_layers': 3, 'ground_fill': False, 'render_scale': 1.0},
+    {'frozen_layers': 3, 'ground_fill': False, 'render_scale': 0.75},
+    {'frozen_layers': 3, 'ground_fill': False, 'render_scale': 0.5},
+]
+QUALITY_WINDOW = 60 # Frames judged together
+QUALITY_PERCENTILE = 0.9 # Frame time percentile compared with the budget
+QUALITY_DOWNGRADE_RATIO = 1.0 # Drop a level when over this fraction of the frame budget
+QUALITY_UPGRADE_RATIO = 0.6 # Raise a level when under this fraction...
+QUALITY_UPGRADE_WINDOWS = 3 # ...for this many windows in a row
+
+# --- Startup ---
+# FAST_STARTUP starts only the pygame subsystems the game uses (display, which brings events,
+# and the clock) instead of pygame.init(), which also opens audio and joysticks.
+# STARTUP_REPORT prints how long each startup phase took (imports, init, set_mode, assets, first flip)
+# and warns when the first frame takes longer than STARTUP_BUDGET_MS.
+FAST_STARTUP = True
+STARTUP_REPORT = True
+STARTUP_BUDGET_MS = 500
+
+# --- Snapshots ---
+# The simulation state is packed into a fixed-size record after every step and the last
+# SNAPSHOT_SECONDS are kept in a ring buffer allocated once (see snapshot.py; about 3 MB with
+# the defaults, mostly room for entities), cheap enough to leave on. KEY_REWIND goes back REWIND_SECONDS per press; KEY_SAVE_STATE and KEY_LOAD_STATE
+# write and read SAVE_STATE_PATH. Rewinding and loading are disabled while recording input.
+SNAPSHOTS_ENABLED = True
+SNAPSHOT_SECONDS = 10
+# Entities each snapshot has room for (38 bytes each); a state taken with more alive cannot be
+# rewound to or loaded
+SNAPSHOT_MAX_ENTITIES = 128
+REWIND_SECONDS = 1.0
+SAVE_STATE_PATH = 'quicksave.gxsv'
+
+# --- Gameplay Capture ---
+# Record what is shown to CAPTURE_PATH while playing (see capture.py; surface backend only).
+# Each presented frame is copied into one of CAPTURE_BUFFERS preallocated buffers and written by
+# a background thread, compressed ('gxcap') or as is ('raw', for ffmpeg). When every buffer is
+# still waiting to be written, CAPTURE_WHEN_BEHIND = 'drop' skips the frame and 'block' waits.
+CAPTURE_PATH = None # e.g. 'session.gxcap'; None = off
+CAPTURE_FORMAT = 'gxcap'
+CAPTURE_BUFFERS = 8
+CAPTURE_WHEN_BEHIND = 'drop'
+CAPTURE_COMPRESSION_LEVEL = 1 # zlib level: 1 is fastest, and still shrinks frames a lot
+
+# --- Profiling ---
+# Per-frame timing of the main loop steps (see profiler.py). The overlay is toggled with
+# PROFILER_TOGGLE_KEY; recorded frames are written to PROFILER_DUMP_PATH (.csv or .json) on exit.
+PROFILER_ENABLED = False
+PROFILER_HISTORY = 600 # Frames kept in the ring buffer
+PROFILER_DUMP_PATH = 'profile.csv' # None = don't write a file
+
+# --- Input Recording ---
+# Record every player action to this file (see replay.py); None = don't record
+INPUT_RECORD_PATH = None
+
+# --- Camera ---
+# Screen X the camera keeps the player's centre at while scrolling
+CAMERA_ANCHOR_X = SCREEN_WIDTH // 2
+# Sprites are indexed in world columns this wide (see camera.CameraGroup), so drawing only
+# looks at the columns in view; roughly the width of the widest sprite or a bit more works well
+CULL_BUCKET_WIDTH = 256
 
 
 # Keyboard mappings
@@ -70,3 +209,7 @@ KEY_LEFT = pygame.K_LEFT
 KEY_RIGHT = pygame.K_RIGHT
 KEY_JUMP = pygame.K_SPACE # Or pygame.K_UP
 KEY_QUIT = pygame.QUIT
+PROFILER_TOGGLE_KEY = pygame.K_F3
+KEY_REWIND = pygame.K_BACKSPACE
+KEY_SAVE_STATE = pygame.K_F5
+KEY_LOAD_STATE = pygame.K_F9
@@ -0,0 +1,196 @@
+# snapshot.py
+# Compact simulation snapshots: the state Game.update() advances, packed into one fixed-layout
+# binary record. A record is written after every simulation step into a ring buffer allocated
+# up front, so the last SNAPSHOT_SECONDS can be rewound to at once, and a record can be saved
+# to disk and loaded back (quicksave / quickload).
+#
+# The record holds the step counter, the player's position, velocity, ground contact,
+# interpolation start and animation state, the direction world streaming looks ahead in, and
+# the entity batch in a block with room for SNAPSHOT_MAX_ENTITIES rows. Everything else is
+# derived from those (camera, sprite culling index, streamed chunks) or is not simulation
+# state (frame timing in main.py). A state with more entities than fit is marked as not held
+# and cannot be restored.
+#
+# Record layout (little-endian):
+#   STATE_RECORD, entity count uint16, SNAPSHOT_MAX_ENTITIES rows of entities.SNAPSHOT_ROW
+#
+# Save file layout (little-endian):
+#   header : magic b'GXSV', version, simulation rate (Hz), record size
+#   record : as above
+import struct
+import settings # Import settings module
+import animation # Import animation module
+
+# tick, x, y, change_x, change_y, on_ground, has previous position, previous x, previous y,
+# animation state, frame position, steps on frame, facing left, travel direction
+STATE_RECORD = struct.Struct('<IiiddBBiiBHHBb')
+STATE_INDEX = {state: i for i, state in enumerate(animation.STATES)}
+
+ENTITY_COUNT = struct.Struct('<H')
+ENTITY_ROW_SIZE = 38 # entities.SNAPSHOT_ROW.itemsize, fixed here so records keep their size without NumPy
+ENTITIES_NOT_HELD = 0xFFFF # Entity count of a state with more entities than fit
+
+SAVE_HEADER = struct.Struct('<4sHHI')
+SAVE_MAGIC = b'GXSV'
+SAVE_VERSION = 2 # Version 1 had no entity block
+
+
+def record_size():
+    """ Bytes in one snapshot record """
+    return STATE_RECORD.size + ENTITY_COUNT.size + settings.SNAPSHOT_MAX_ENTITIES * ENTITY_ROW_SIZE
+
+
+def pack_state(game_state, buffer, offset=0):
+    """ Write the simulation state into buffer (a bytearray) at offset """
+    player = game_state.player
+    animator = player.animator
+    previous = player.previous_pos
+    has_previous = previous is not None
+    previous_x, previous_y = previous if has_previous else (0, 0)
+    STATE_RECORD.pack_into(buffer, offset, game_state.tick, player.rect.x, player.rect.y,
+                           player.change_x, player.change_y, player.on_ground,
+                           has_previous, previous_x, previous_y,
+                           STATE_INDEX[animator.state], animator.frame_position, animator.ticks,
+                           animator.facing_left, game_state.travel_direction)
+
+    entities = game_state.entities
+    count = 0 if entities is None else entities.count
+    entities_offset = offset + STATE_RECORD.size + ENTITY_COUNT.size
+    if count > settings.SNAPSHOT_MAX_ENTITIES:
+        ENTITY_COUNT.pack_into(buffer, offset + STATE_RECORD.size, ENTITIES_NOT_HELD)
+        return
+    ENTITY_COUNT.pack_into(buffer, offset + STATE_RECORD.size, count)
+    if count:
+        entities.pack_rows(buffer, entities_offset, settings.SNAPSHOT_MAX_ENTITIES)
+
+
+def unpack_state(game_state, buffer, offset=0):
+    """ Restore the simulation state from a record in buffer at offset.
+
+    The whole record is checked first, so a bad one raises ValueError with nothing restored.
+    """
+    (tick, x, y, change_x, change_y, on_ground, has_previous, previous_x, previous_y,
+     state, frame_position, frame_ticks, facing_left, travel_direction) = STATE_RECORD.unpack_from(buffer, offset)
+    count, = ENTITY_COUNT.unpack_from(buffer, offset + STATE_RECORD.size)
+
+    player = game_state.player
+    animator = player.animator
+    if state >= len(animation.STATES):
+        raise ValueError(f"unknown animation state {state}")
+    frames, _ = animator.animations[animation.STATES[state]]
+    if frame_position >= len(frames):
+        raise ValueError(f"animation frame {frame_position} out of range")
+    if travel_direction not in (-1, 1):
+        raise ValueError(f"invalid travel direction {travel_direction}")
+    if change_x != change_x or change_y != change_y: # NaN
+        raise ValueError("invalid player velocity")
+    if count == ENTITIES_NOT_HELD:
+        raise ValueError(f"more than SNAPSHOT_MAX_ENTITIES ({settings.SNAPSHOT_MAX_ENTITIES}) entities were alive")
+    if count > settings.SNAPSHOT_MAX_ENTITIES:
+        raise ValueError(f"entity count {count} out of range")
+    rows = None
+    if game_state.entities is not None:
+        rows = game_state.entities.check_rows(buffer, offset + STATE_RECORD.size + ENTITY_COUNT.size, count)
+    elif count:
+        raise ValueError("the state has entities, which need NumPy")
+
+    game_state.tick = tick
+    game_state.travel_direction = travel_direction
+
+    player.rect.x = x
+    player.rect.y = y
+    player.change_x = change_x
+    player.change_y = change_y
+    player.on_ground = bool(on_ground)
+    player.previous_pos = (previous_x, previous_y) if has_previous else None
+
+    animator.state = animation.STATES[state]
+    animator.frame_position = frame_position
+    animator.ticks = frame_ticks
+    animator.facing_left = bool(facing_left)
+    player.image = animator.current_frame()
+
+    # Bring the derived state up to date with the restored position
+    game_state.all_sprites.reindex(player)
+    game_state.stream_world()
+
+    if rows is not None:
+        # After streaming, so the chunks resident now are final
+        game_state.entities.restore_rows(rows)
+        if game_state.world is not None:
+            # The snapshot may hold entities of chunks no longer resident, or lack those of chunks loaded since
+            game_state.world.sync_entities()
+
+
+class SnapshotRing:
+    def __init__(self, capacity=None):
+        """ The last capacity snapshots (SNAPSHOT_SECONDS of steps by default) in one preallocated buffer """
+        self.capacity = capacity or max(1, round(settings.SNAPSHOT_SECONDS * settings.SIMULATION_HZ))
+        self.record_size = record_size()
+        # Allocated once: taking a snapshot only packs into it
+        self.buffer = bytearray(self.capacity * self.record_size)
+        self.slot = 0 # Ring position the next snapshot goes in
+        self.count = 0 # Snapshots held, the newest being the current state
+
+    def clear(self):
+        """ Forget every snapshot """
+        self.slot = 0
+        self.count = 0
+
+    def capture(self, game_state):
+        """ Record the state after a simulation step, overwriting the oldest once full """
+        pack_state(game_state, self.buffer, self.slot * self.record_size)
+        self.slot += 1
+        if self.slot == self.capacity:
+            self.slot = 0
+        if self.count < self.capacity:
+            self.count += 1
+
+    def seconds_held(self):
+        """ How far back rewind() can go, in seconds """
+        return max(0, self.count - 1) / settings.SIMULATION_HZ
+
+    def rewind(self, game_state, steps):
+        """ Restore the state of steps simulation steps ago (at most as far back as is held).
+
+        The snapshots after it are dropped, so play continues from there. Returns the steps rewound.
+        Raises ValueError, leaving the state and the snapshots as they were, if that state cannot be restored.
+        """
+        steps = min(steps, self.count - 1)
+        if steps <= 0:
+            return 0
+        slot = (self.slot - steps) % self.capacity
+        unpack_state(game_state, self.buffer, (slot - 1) % self.capacity * self.record_size)
+        self.slot = slot
+        self.count -= steps
+        return steps
+
+
+def save_state(path, game_state):
+    """ Write the current simulation state to path """
+    data = bytearray(SAVE_HEADER.size + record_size())
+    SAVE_HEADER.pack_into(data, 0, SAVE_MAGIC, SAVE_VERSION, settings.SIMULATION_HZ, record_size())
+    pack_state(game_state, data, SAVE_HEADER.size)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def load_state(path, game_state):
+    """ Restore the simulation state saved in path (raises ValueError if it is not a saved state) """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < SAVE_HEADER.size:
+        raise ValueError(f"{path} is not a saved state")
+    magic, version, simulation_hz, size = SAVE_HEADER.unpack_from(data)
+    if magic != SAVE_MAGIC or version != SAVE_VERSION:
+        raise ValueError(f"{path} is not a saved state")
+    if size != record_size():
+        raise ValueError(f"{path} was saved with a different SNAPSHOT_MAX_ENTITIES")
+    if len(data) != SAVE_HEADER.size + size:
+        raise ValueError(f"{path} is cut short")
+    if simulation_hz != settings.SIMULATION_HZ:
+        print(f"Warning: state saved at {simulation_hz} Hz, running at {settings.SIMULATION_HZ} Hz")
+    try:
+        unpack_state(game_state, data, SAVE_HEADER.size)
+    except ValueError as e:
+        raise ValueError(f"{path} cannot be restored: {e}")
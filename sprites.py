@@ -1,22 +1,40 @@
 # sprites.py
 import pygame
 import settings # Import settings module
+import assets # Import assets module
+import animation # Import animation module
 
 class Player(pygame.sprite.Sprite):
-    def __init__(self):
-        """ Initialize player sprite """
+    def __init__(self, loader=None, level=None):
+        """ Initialize player sprite, loading its image in the background if an AssetLoader is given.
+
+        level is an optional collision.SpatialGrid of solid level geometry.
+        """
         super().__init__()
 
-        # Attempt to load player image from settings
-        try:
-            self.image = pygame.image.load(settings.PLAYER_IMAGE_PATH).convert_alpha()
-            self.rect = self.image.get_rect()
-        except pygame.error:
-             # Fallback to a simple red square if image loading fails
-             print(f"Warning: Player image '{settings.PLAYER_IMAGE_PATH}' not found. Using a red square placeholder.")
-             self.image = pygame.Surface([40, 50])
-             self.image.fill(settings.RED)
-             self.rect = self.image.get_rect()
+        # Solid level geometry to collide with (besides the ground line)
+        self.level = level
+
+        # Animation state machine choosing frames from the sprite sheet (set by use_sheet)
+        self.animator = None
+        self.rect = pygame.Rect(0, 0, 0, 0)
+
+        self.pooled_image = None # Sheet atlas held from the shared pool, given back by close()
+        self.closed = False
+        self.image_pending = False # Still showing the placeholder while the real image loads
+
+        if loader is not None:
+            # Show the placeholder until the real image arrives
+            self.use_sheet(animation.SpriteSheet(self.make_placeholder(), 1, 1))
+            self.image_pending = True
+            assets.shared_pool.acquire_async(loader, settings.PLAYER_IMAGE_PATH, None, self.set_image)
+        else:
+            # Attempt to load player image from settings
+            try:
+                img = assets.shared_pool.acquire(settings.PLAYER_IMAGE_PATH) # Shared with other players using it
+            except pygame.error:
+                img = None
+            self.set_image(img)
 
         # Player movement variables (velocity)
         self.change_x = 0
@@ -25,14 +43,76 @@ class Player(pygame.sprite.Sprite):
         # Player state
         self.on_ground = False # True if player is currently on the ground
 
+        # Position at the start of the last simulation step, used to interpolate rendering
+        self.previous_pos = None
+
+    def make_placeholder(self):
+        """ Simple red square used when the player image is missing or still loading """
+        placeholder = pygame.Surface([40, 50])
+        placeholder.fill(settings.RED)
+        return placeholder
+
+    def set_image(self, img):
+        """ Use the loaded sprite sheet atlas img (None if loading failed) for the player """
+        self.image_pending = False
+        if self.closed and img is not None:
+            assets.shared_pool.release(img) # Finished loading after close()
+            return
+        if img is None:
+             # Fallback to a simple red square if image loading fails
+             print(f"Warning: Player image '{settings.PLAYER_IMAGE_PATH}' not found. Using a red square placeholder.")
+             self.use_sheet(animation.SpriteSheet(self.make_placeholder(), 1, 1))
+             return
+
+        self.use_sheet(animation.SpriteSheet(img, settings.PLAYER_SHEET_COLUMNS, settings.PLAYER_SHEET_ROWS,
+                                             settings.PLAYER_SHEET_FACES_RIGHT))
+        if self.pooled_image is not None:
+            assets.shared_pool.release(self.pooled_image)
+        self.pooled_image = img
+
+    def close(self):
+        """ Give the player image back to the pool """
+        self.closed = True
+        if self.pooled_image is not None:
+            assets.shared_pool.release(self.pooled_image)
+            self.pooled_image = None
+
+    def use_sheet(self, sheet):
+        """ Animate from a new sprite sheet, keeping the bottom-left corner (and so the footing) in place """
+        animator = animation.Animator(sheet, settings.PLAYER_ANIMATIONS)
+        if self.animator is not None:
+            animator.facing_left = self.animator.facing_left # Keep facing if the sheet is swapped mid-game
+        self.animator = animator
+
+        bottomleft = self.rect.bottomleft
+        self.image = animator.current_frame()
+        self.rect = self.image.get_rect(bottomleft=bottomleft)
+
     def update(self):
-        """ Update player position and state each frame """
+        """ Update player position and state for one fixed simulation step """
+        # Remember where this step started so rendering can interpolate between steps
+        self.previous_pos = self.rect.topleft
+
         # Apply gravity
         self.apply_gravity()
 
         # Apply vertical movement
+        start_y = self.rect.y
         self.rect.y += self.change_y
 
+        # Gravity pulls the player down every step, so standing is re-established below;
+        # walking off a platform edge leaves on_ground False
+        self.on_ground = False
+
+        # --- Vertical collision with level geometry ---
+        if self.level is not None:
+            hit = self.level.resolve_y(self.rect, start_y)
+            if hit > 0: # Landed on top of a solid
+                self.change_y = 0
+                self.on_ground = True
+            elif hit < 0: # Bumped into a solid from below
+                self.change_y = 0
+
         # --- Vertical collision with the ground ---
         # Check if player's bottom has reached or passed the visible ground level
         if self.rect.bottom >= settings.VISIBLE_GROUND_Y:
@@ -41,16 +121,28 @@ class Player(pygame.sprite.Sprite):
              self.on_ground = True # Player is on the ground
 
         # Apply horizontal movement
+        start_x = self.rect.x
         self.rect.x += self.change_x
 
-        # --- Horizontal collision handling would go here ---
+        # --- Horizontal collision with level geometry ---
+        # Walls stop the player, but change_x is kept so holding the key keeps pushing
+        if self.level is not None:
+            self.level.resolve_x(self.rect, start_x)
+
+        # --- Animation ---
+        # Pick this step's frame (a precomputed atlas view, so nothing is allocated)
+        self.image = self.animator.update(self.change_x, self.change_y, self.on_ground)
+
 
-        # Update on_ground state if player moves off the ground (and isn't falling due to jump)
-        # Note: This is a simplified check. More robust logic involves checking platforms below.
-        # If the player was on the ground but is now above it due to vertical movement (e.g. falling off edge)
-        if self.on_ground and self.change_y == 0 and self.rect.bottom < settings.VISIBLE_GROUND_Y:
-             self.on_ground = False
+    def get_render_rect(self, alpha):
+        """ Return the rect to draw at, interpolated between the previous and current step (alpha in 0..1) """
+        if self.previous_pos is None:
+            return self.rect.copy() # No step taken yet, nothing to interpolate from
 
+        prev_x, prev_y = self.previous_pos
+        x = prev_x + (self.rect.x - prev_x) * alpha
+        y = prev_y + (self.rect.y - prev_y) * alpha
+        return pygame.Rect(round(x), round(y), self.rect.width, self.rect.height)
 
     def apply_gravity(self):
         """ Apply gravity to the player's vertical speed """
@@ -0,0 +1,115 @@
+# texture_renderer.py
+# Texture rendering backend: every surface the game draws is uploaded once as an SDL texture and
+# frames are composed with Renderer copies instead of software blits. The frame is composed at
+# the render scale's size and the renderer scales it to the window while drawing, so neither the
+# compositing nor the upscale runs on the CPU blitter where an accelerated driver exists.
+# SDL's software renderer works too (e.g. on a headless box with SDL_VIDEODRIVER=dummy).
+#
+# pygame._sdl2 is not a stable pygame API; available() is False if it cannot be imported.
+import weakref
+import pygame
+import settings # Import settings module
+
+try:
+    from pygame._sdl2 import video
+except ImportError:
+    video = None
+
+
+def available():
+    """ True if pygame provides the SDL2 Renderer/Texture API """
+    return video is not None
+
+
+class TextureRenderer:
+    def __init__(self, title, render_scale=1.0):
+        """ Open a window drawn by an SDL Renderer, composing frames at render_scale of the logical screen.
+
+        The display module must already have a mode set (a hidden one will do), since images
+        are still converted to the display format when they are loaded.
+        """
+        self.window = video.Window(title, size=(settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT),
+                                   resizable=settings.RESIZABLE_WINDOW)
+        # accelerated=-1 takes a GPU renderer if there is one and SDL's software renderer otherwise
+        self.renderer = video.Renderer(self.window, accelerated=-1, vsync=settings.VSYNC)
+
+        # Uploaded textures, dropped together with the surface they were made from
+        self.textures = weakref.WeakKeyDictionary() # Surface -> Texture
+        self.uploads = 0 # Surfaces uploaded so far
+
+        self.render_scale = render_scale
+        self.size = None
+        self.set_render_scale(render_scale)
+
+    def set_render_scale(self, render_scale):
+        """ Compose frames at a different fraction of the logical screen size """
+        self.render_scale = render_scale
+        self.size = (round(settings.SCREEN_WIDTH * render_scale), round(settings.SCREEN_HEIGHT * render_scale))
+        # Draw coordinates are in this size; the renderer scales them to the window (letterboxed)
+        self.renderer.logical_size = self.size
+
+    def set_caption(self, title):
+        """ Set the window title """
+        self.window.title = title
+
+    def texture(self, surface):
+        """ The texture for a surface, uploaded the first time it is drawn.
+
+        Surfaces are treated as unchanging once drawn; anything redrawn must be a new surface.
+        """
+        texture = self.textures.get(surface)
+        if texture is None:
+            texture = video.Texture.from_surface(self.renderer, surface)
+            self.textures[surface] = texture
+            self.uploads += 1
+        return texture
+
+    # --- The part of the Surface interface Game.draw() uses, so it can draw here directly ---
+
+    def get_size(self):
+        """ Size of the frame being composed """
+        return self.size
+
+    def fill(self, color, rect=None):
+        """ Fill the frame (or rect of it) with a solid colour """
+        self.renderer.draw_color = pygame.Color(color) # Accepts (r, g, b) like Surface.fill()
+        if rect is None:
+            self.renderer.clear()
+        else:
+            self.renderer.fill_rect(rect)
+
+    def blits(self, blit_sequence, doreturn=True):
+        """ Draw (surface, dest[, area]) commands as texture copies, like Surface.blits() """
+        for blit in blit_sequence:
+            surface, dest = blit[0], blit[1]
+            area = blit[2] if len(blit) > 2 else None
+            if area is None:
+                width, height = surface.get_size()
+            else:
+                width, height = area[2], area[3]
+            self.texture(surface).draw(srcrect=area, dstrect=(dest[0], dest[1], width, height))
+        return [] if doreturn else None
+
+    # --- Frame presentation ---
+
+    def draw_overlay(self, draw):
+        """ Draw something at window resolution on top of the frame: draw(surface) paints a transparent surface """
+        window_size = self.window.size
+        overlay = pygame.Surface(window_size, pygame.SRCALPHA)
+        draw(overlay)
+
+        self.renderer.logical_size = window_size # Not scaled, so text stays readable
+        # A fresh texture every frame; overlays change every frame anyway
+        video.Texture.from_surface(self.renderer, overlay).draw()
+        self.renderer.logical_size = self.size
+
+    def present(self):
+        """ Show the composed frame """
+        self.renderer.present()
+
+    def close(self):
+        """ Free the textures, renderer and window (before pygame.quit, which they must not outlive) """
+        self.textures.clear()
+        self.renderer = None
+        self.window.destroy()
+        self.window = None
@@ -0,0 +1,245 @@
+# world.py
+# Chunked, streaming world: the level is split into fixed-width horizontal chunks stored as
+# small binary files, loaded ahead of the player and evicted (least recently used) behind.
+#
+# Chunk file layout (little-endian):
+#   header   : magic b'GXCH', version, width (tiles), height (tiles), entity count
+#   tiles    : width * height bytes, row-major, 0 = empty, anything else = solid tile id
+#   entities : entity count records of (kind, x, y, flags), x/y in pixels relative to the chunk;
+#              kind and flags as in entities.py. They join the EntityBatch while the chunk is loaded.
+#
+# Generate a demo world with:  python world.py --generate 64
+import os
+import sys
+import mmap
+import random
+import struct
+import argparse
+from collections import OrderedDict
+import pygame
+import settings # Import settings module
+
+CHUNK_HEADER = struct.Struct('<4sHHHH')
+CHUNK_MAGIC = b'GXCH'
+CHUNK_VERSION = 1
+ENTITY_RECORD = struct.Struct('<HhhH')
+
+# Entity kinds and flags written by generate_demo_world (see entities.py, which needs NumPy)
+DEMO_KIND_ENEMY = 0
+DEMO_KIND_PICKUP = 2
+DEMO_FLAG_NO_GRAVITY = 2
+
+
+def chunk_path(directory, index):
+    """ Path of the file holding chunk number index """
+    return os.path.join(directory, f"chunk_{index:05d}.bin")
+
+
+class Chunk:
+    def __init__(self, index, tiles=None, entities=(), nbytes=0):
+        """ One loaded chunk: tile ids, entity records and the solids it added to the level """
+        self.index = index
+        self.tiles = tiles # memoryview over the mapped tile bytes (None = empty chunk)
+        self.entities = list(entities) # (kind, x, y, flags) in world pixels
+        self.nbytes = nbytes # Resident size, counted against the memory budget
+        self.solids = [] # Rects this chunk added to the collision grid
+        self.mapping = None # mmap backing self.tiles
+
+    def close(self):
+        """ Release the file mapping """
+        if self.tiles is not None:
+            self.tiles.release()
+            self.tiles = None
+        if self.mapping is not None:
+            self.mapping.close()
+            self.mapping = None
+
+
+def load_chunk(directory, index):
+    """ Memory-map a chunk file; a missing or damaged file is an empty chunk """
+    width_px = settings.CHUNK_WIDTH_TILES * settings.TILE_SIZE
+    try:
+        with open(chunk_path(directory, index), 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError): # Missing file, or empty file that cannot be mapped
+        return Chunk(index, nbytes=CHUNK_HEADER.size) # Still counts, so empty chunks get evicted too
+
+    if len(mapped) < CHUNK_HEADER.size:
+        print(f"Warning: ignoring chunk {index} cut short at {len(mapped)} bytes")
+        mapped.close()
+        return Chunk(index, nbytes=CHUNK_HEADER.size)
+    magic, version, width, height, entity_count = CHUNK_HEADER.unpack_from(mapped)
+    if magic != CHUNK_MAGIC or version != CHUNK_VERSION or (width, height) != (settings.CHUNK_WIDTH_TILES, settings.CHUNK_HEIGHT_TILES):
+        print(f"Warning: ignoring chunk {index} with unexpected format")
+        mapped.close()
+        return Chunk(index, nbytes=CHUNK_HEADER.size)
+
+    tiles_start = CHUNK_HEADER.size
+    entities_start = tiles_start + width * height
+    entities_end = entities_start + entity_count * ENTITY_RECORD.size
+    if len(mapped) < entities_end:
+        # tile_solids() and the entity records would read past the end of the file
+        print(f"Warning: ignoring chunk {index} cut short at {len(mapped)} of {entities_end} bytes")
+        mapped.close()
+        return Chunk(index, nbytes=CHUNK_HEADER.size)
+
+    entities = [(kind, index * width_px + x, y, flags)
+                for kind, x, y, flags in ENTITY_RECORD.iter_unpack(mapped[entities_start:entities_end])]
+
+    chunk = Chunk(index, memoryview(mapped)[tiles_start:entities_start], entities, len(mapped))
+    chunk.mapping = mapped
+    return chunk
+
+
+def save_chunk(directory, index, tiles, entities=()):
+    """ Write a chunk file from a bytes-like of tile ids and (kind, x, y, flags) entity records """
+    os.makedirs(directory, exist_ok=True)
+    with open(chunk_path(directory, index), 'wb') as f:
+        f.write(CHUNK_HEADER.pack(CHUNK_MAGIC, CHUNK_VERSION, settings.CHUNK_WIDTH_TILES,
+                                  settings.CHUNK_HEIGHT_TILES, len(entities)))
+        f.write(bytes(tiles))
+        for record in entities:
+            f.write(ENTITY_RECORD.pack(*record))
+
+
+def tile_solids(chunk):
+    """ Merge each row's runs of solid tiles into world-space rects """
+    solids = []
+    if chunk.tiles is None:
+        return solids
+
+    size = settings.TILE_SIZE
+    width = settings.CHUNK_WIDTH_TILES
+    origin_x = chunk.index * width * size
+    for row in range(settings.CHUNK_HEIGHT_TILES):
+        row_tiles = chunk.tiles[row * width:(row + 1) * width]
+        column = 0
+        while column < width:
+            if row_tiles[column]:
+                run_start = column
+                while column < width and row_tiles[column]:
+                    column += 1
+                solids.append(pygame.Rect(origin_x + run_start * size, row * size, (column - run_start) * size, size))
+            else:
+                column += 1
+    return solids
+
+
+class StreamingWorld:
+    def __init__(self, level, directory=None, entities=None):
+        """ Stream chunks from directory around the camera, adding their solids to the level grid.
+
+        entities is the game's entities.EntityBatch (None without NumPy); each chunk's entity
+        records are spawned into it on load and removed again on eviction.
+        """
+        self.level = level # collision.SpatialGrid shared with the player
+        self.entities = entities
+        self.directory = directory or settings.WORLD_DIR
+        self.chunks = OrderedDict() # index -> Chunk, least recently used first
+        self.resident_bytes = 0
+        self.chunk_width_px = settings.CHUNK_WIDTH_TILES * settings.TILE_SIZE
+        self.needed = None # Chunk range wanted at the last update, to skip unchanged frames
+
+    def update(self, view_left, view_width, direction):
+        """ Make sure the chunks around the view (and ahead in the direction of travel) are loaded """
+        first = int(view_left // self.chunk_width_px)
+        last = int((view_left + view_width - 1) // self.chunk_width_px)
+
+        # Load ahead of the player, and keep one chunk behind for short turn-arounds
+        if direction >= 0:
+            needed = range(first - 1, last + settings.CHUNK_LOAD_AHEAD + 1)
+        else:
+            needed = range(first - settings.CHUNK_LOAD_AHEAD, last + 2)
+        if needed == self.needed:
+            return
+        self.needed = needed
+
+        for index in needed:
+            chunk = self.chunks.get(index)
+            if chunk is None:
+                self.load(index)
+            else:
+                self.chunks.move_to_end(index) # Recently used
+
+        self.evict(needed)
+
+    def load(self, index):
+        """ Load one chunk and add its solids and entities to the game """
+        chunk = load_chunk(self.directory, index)
+        for solid in tile_solids(chunk):
+            chunk.solids.append(self.level.add(solid))
+        if self.entities is not None and chunk.entities:
+            self.entities.spawn_records(chunk.entities, index)
+        self.chunks[index] = chunk
+        self.resident_bytes += chunk.nbytes
+
+    def evict(self, needed):
+        """ Drop least recently used chunks until resident memory fits the budget """
+        for index in list(self.chunks):
+            if self.resident_bytes <= settings.WORLD_MEMORY_BUDGET:
+                break
+            if index in needed:
+                continue # Never evict what is in view or about to be
+            chunk = self.chunks.pop(index)
+            for solid in chunk.solids:
+                self.level.remove(solid)
+            if self.entities is not None and chunk.entities:
+                self.entities.kill_owned(index) # Wherever they have walked to since
+            self.resident_bytes -= chunk.nbytes
+            chunk.close()
+
+    def sync_entities(self):
+        """ Make the entity batch hold the entities of exactly the resident chunks again.
+
+        Used after the batch was restored from a snapshot taken while other chunks were resident.
+        """
+        if self.entities is None:
+            return
+        owners = self.entities.owners()
+        for index in owners - set(self.chunks):
+            self.entities.kill_owned(index)
+        for index, chunk in self.chunks.items():
+            if chunk.entities and index not in owners:
+                self.entities.spawn_records(chunk.entities, index)
+
+
+def generate_demo_world(directory, num_chunks, seed=0):
+    """ Write num_chunks chunks of random floating platforms, with enemies and pickups, to directory """
+    rng = random.Random(seed)
+    width = settings.CHUNK_WIDTH_TILES
+    height = settings.CHUNK_HEIGHT_TILES
+    ground_row = settings.VISIBLE_GROUND_Y // settings.TILE_SIZE
+    for index in range(num_chunks):
+        tiles = bytearray(width * height)
+        records = []
+        for _ in range(rng.randint(2, 5)):
+            # Above head height, so the player can always walk underneath
+            row = rng.randint(ground_row - 12, ground_row - 9)
+            start = rng.randrange(width - 3)
+            for column in range(start, min(width, start + rng.randint(3, 8))):
+                tiles[row * width + column] = 1
+            # A pickup floating above the middle of the platform
+            pickup_x = (start + 1) * settings.TILE_SIZE
+            records.append((DEMO_KIND_PICKUP, pickup_x, (row - 1) * settings.TILE_SIZE, DEMO_FLAG_NO_GRAVITY))
+        for _ in range(rng.randint(0, 2)):
+            # Enemies drop onto the ground line
+            records.append((DEMO_KIND_ENEMY, rng.randrange(width * settings.TILE_SIZE), 0, 0))
+        save_chunk(directory, index, tiles, records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunked world tools")
+    parser.add_argument('--generate', type=int, metavar='N', help="write a demo world of N chunks")
+    parser.add_argument('--dir', default=settings.WORLD_DIR, help="world directory")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.generate is None:
+        parser.print_help()
+        sys.exit(1)
+    generate_demo_world(args.dir, args.generate, args.seed)
+    print(f"Wrote {args.generate} chunks to {args.dir}")
+
+
+if __name__ == '__main__':
+    main()